@@ -27,6 +27,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
+from app.database.models.batch import Batch
 from app.database.models.job import Job
 from app.database.models.extraction_result import ExtractionResult
 from app.database.models.order_position import OrderPosition
@@ -1,7 +1,12 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from app.database.models.job import JobStatus
 
 class InfoResponse(BaseModel):
     """Basic info response model"""
@@ -13,4 +18,19 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     service: str
-    is_database_connected: str
\ No newline at end of file
+    is_database_connected: str
+class JobResponse(BaseModel):
+    """Job status, without callback URL, content hash and routing internals"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    batch_id: Optional[int] = None
+    status: JobStatus
+    error: Optional[str] = None
+    pages_processed: int
+    page_count: Optional[int] = None
+    deadline_at: Optional[datetime] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    metrics: Optional[Dict[str, Any]] = None
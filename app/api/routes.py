@@ -1,19 +1,64 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+import asyncio
+import os
+import time
+import zipfile
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from celery import group
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func, select
+from sqlalchemy.orm import noload
+from starlette.concurrency import run_in_threadpool
 
 from app.database.dependencies import get_db
+from app.services.export.export_cache import cache_export_response, etag_matches, get_cached_export
 from app.services.export.export_factory import ExportFactory
+from app.database.models.batch import Batch
 from app.database.models.job import Job, JobStatus
 from app.config.settings import settings
-from app.api.dto import HealthResponse, InfoResponse
-from app.worker import process_document
+from app.api.dto import HealthResponse, InfoResponse, JobResponse
+from app.worker import process_document_signature, send_job_callback
 from app.database.models.extraction_result import ExtractionResult
+from app.database.redis_client import get_async_redis
+from app.services.deduplication_service import deduplicate_job, insert_deduplicated_jobs
+from app.services.job_routing import BULK_QUEUE, FAST_QUEUE, job_route, queue_keys
+from app.services.job_events import (
+    batch_channel,
+    close_subscription,
+    job_channel,
+    stream_batch_events,
+    stream_job_events,
+    subscribe,
+    summarize_job_statuses,
+)
+from app.services.prometheus_metrics import StateCollector, observe_export, render_metrics
+from app.utils.config_version import get_config_version
+from app.utils.extract_pdfs_from_zip import extract_pdfs_from_zip
+from app.utils.is_valid_callback_url import is_valid_callback_url
+from app.utils.job_file_path import job_file_path
+from app.utils.pdf_page_count import pdf_page_count
+from app.utils.save_upload_file import UploadTooLargeError, save_upload_file
 
 router = APIRouter()
 
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+# Proxies must neither buffer nor cache event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def normalize_deadline(deadline_at: Optional[datetime]) -> Optional[datetime]:
+    # Deadlines without a timezone are taken as UTC
+    if deadline_at is not None and deadline_at.tzinfo is None:
+        return deadline_at.replace(tzinfo=timezone.utc)
+
+    return deadline_at
+
 @router.get("/", response_model=InfoResponse)
 async def root():
 
@@ -44,35 +89,101 @@ async def health(db: AsyncSession = Depends(get_db)):
         is_database_connected="connected" if is_database_connected else "disconnected"
     )
 
+@router.get("/metrics")
+async def metrics(db: AsyncSession = Depends(get_db)):
+    # Jobs in flight only, a partial index keeps this cheap. Completed and failed
+    # jobs are counted by docint_jobs_finished on the workers.
+    active_statuses = (JobStatus.pending, JobStatus.running)
+    result = await db.execute(
+        select(Job.status, func.count())
+        .where(Job.status.in_(active_statuses))
+        .group_by(Job.status)
+    )
+    job_counts = {status.value: 0 for status in active_statuses}
+    job_counts.update({status.value: count for status, count in result.all()})
+
+    queue_depths = {}
+
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            for queue in (FAST_QUEUE, BULK_QUEUE):
+                for key in queue_keys(queue):
+                    pipe.llen(key)
+
+            lengths = iter(await pipe.execute())
+
+        for queue in (FAST_QUEUE, BULK_QUEUE):
+            queue_depths[queue] = sum(next(lengths) for _ in queue_keys(queue))
+    except Exception as e:
+        # The other metrics are still worth scraping
+        print(f"Metrics: reading the queue depths failed: {e}")
+
+    # Histograms of the API process, the workers are scraped on WORKER_METRICS_PORT
+    body = await run_in_threadpool(render_metrics, StateCollector(queue_depths, job_counts))
+
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
 @router.post("/jobs")
-async def create_job(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+async def create_job(
+    file: UploadFile = File(...),
+    callback_url: Optional[str] = Form(None),
+    deadline_at: Optional[datetime] = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
     # Validate file is PDF
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="File must be a PDF")
-        
-    # Create a new job in the database
-    job = Job()
-    db.add(job)
-
-    # Commit the transaction to save the job and get its ID
-    await db.commit()
 
-    # Refresh the job instance to get the updated ID after commit
-    await db.refresh(job)
+    # Resolves the host, so it runs in the thread pool
+    if callback_url is not None and not await run_in_threadpool(is_valid_callback_url, callback_url):
+        raise HTTPException(status_code=400, detail="callback_url must be an http(s) URL of a public host")
 
     #! Note: In prd I would implement a more robust file storage solution like a blog storage
     #! For this example prototype I will skip the blob storage
     #! Just save the file to a local directory named "files" with the job ID as the filename
-    file_path = f"/files/{job.id}.pdf"
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    # The job ID is only known after the duplicate check, so the upload is streamed
+    # into a temporary file first and renamed once the job exists
+    try:
+        temp_path, content_hash = await save_upload_file(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    deadline_at = normalize_deadline(deadline_at)
+
+    try:
+        # The page count decides the lane the job is queued in
+        page_count = await run_in_threadpool(pdf_page_count, temp_path)
+
+        # Create a new job in the database, or link it to an earlier job for the same file
+        job = Job(
+            content_hash=content_hash,
+            config_version=get_config_version(),
+            callback_url=callback_url,
+            page_count=page_count,
+            deadline_at=deadline_at,
+            **job_route(page_count, deadline_at),
+        )
+        needs_processing = await deduplicate_job(db, job)
+
+        # Commit the transaction to save the job and release the deduplication lock
+        await db.commit()
+
+        # Atomic rename, the worker never sees a partially written file
+        await run_in_threadpool(os.replace, temp_path, job_file_path(job.id))
+    finally:
+        if await run_in_threadpool(os.path.exists, temp_path):
+            await run_in_threadpool(os.remove, temp_path)
 
     # Send a task to the Celery worker to process the document
-    process_document.delay(job.id)
+    if needs_processing:
+        process_document_signature(job.id, job.queue, job.priority, job.task_id).apply_async()
+    elif job.status == JobStatus.completed and callback_url:
+        # Result was taken over from an earlier job, nothing will complete this one later
+        send_job_callback.delay(job.id)
 
     return { "job_id": job.id }
 
-@router.get("/jobs/{job_id}")
+@router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
     job = await db.get(Job, job_id)
     
@@ -81,10 +192,38 @@ async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
     
     return job
 
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: int, db: AsyncSession = Depends(get_db)):
+    pubsub = await subscribe(job_channel(job_id))
+
+    try:
+        job = await db.get(Job, job_id)
+    except Exception:
+        await close_subscription(pubsub)
+        raise
+
+    if not job:
+        await close_subscription(pubsub)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    current_event = {
+        "type": "status",
+        "job_id": job.id,
+        "status": job.status.value,
+        "error": job.error,
+    }
+
+    return StreamingResponse(
+        stream_job_events(pubsub, current_event),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 @router.get("/jobs/{job_id}/{format}")
 async def get_job_result(
     job_id: int,
     format: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     job = await db.get(Job, job_id)
@@ -92,17 +231,22 @@ async def get_job_result(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    if job.status != JobStatus.completed:
+    # Running jobs return the positions of the pages processed so far
+    if job.status not in (JobStatus.completed, JobStatus.running):
         raise HTTPException(status_code=400, detail="Job is not completed yet")
 
+    # Positions are not loaded here, the exporters stream them themselves
     result = await db.execute(
         select(ExtractionResult)
         .where(ExtractionResult.job_id == job_id)
-        .options(selectinload(ExtractionResult.positions))
+        .options(noload(ExtractionResult.positions))
     )
     extraction_result = result.scalar_one_or_none()
 
     if not extraction_result:
+        if job.status == JobStatus.running:
+            raise HTTPException(status_code=400, detail="Job has no results yet")
+
         raise HTTPException(status_code=404, detail="Extraction result not found")
 
     try:
@@ -110,4 +254,245 @@ async def get_job_result(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return exporter.export(job_id, extraction_result)
+    start = time.perf_counter()
+
+    if job.status == JobStatus.running:
+        # A partial result grows with every page, so it is neither cached nor given an ETag
+        export = observe_export(format, await exporter.export(job_id, extraction_result), start)
+
+        if not isinstance(export, Response):
+            export = JSONResponse(content=jsonable_encoder(export))
+
+        export.headers.update({
+            "Cache-Control": "no-store",
+            "X-Job-Status": job.status.value,
+            "X-Pages-Processed": str(job.pages_processed),
+            "X-Total-Pages": str(extraction_result.total_pages),
+        })
+
+        return export
+
+    # A completed result never changes (finished jobs are not processed again),
+    # its ID serves as the result version of the cache key
+    cached_export = await get_cached_export(job_id, format, extraction_result.id)
+
+    if cached_export is not None:
+        if etag_matches(request.headers.get("if-none-match"), cached_export.etag):
+            return Response(status_code=304, headers={"ETag": cached_export.etag})
+
+        return cached_export.to_response()
+
+    export = observe_export(format, await exporter.export(job_id, extraction_result), start)
+
+    return await cache_export_response(job_id, format, extraction_result.id, export)
+
+@router.get("/exports/{format}")
+async def export_jobs(format: str, job_id_from: int, job_id_to: int):
+    if job_id_to < job_id_from:
+        raise HTTPException(status_code=400, detail="job_id_to must not be smaller than job_id_from")
+
+    start = time.perf_counter()
+
+    try:
+        exporter = ExportFactory.get_strategy(format)
+
+        # Positions of all completed jobs in the range, ordered by job and position
+        export = await exporter.export_jobs(
+            f"jobs_{job_id_from}_{job_id_to}",
+            Job.id.between(job_id_from, job_id_to),
+            Job.status == JobStatus.completed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return observe_export(format, export, start)
+
+@router.post("/batches")
+async def create_batch(
+    files: List[UploadFile] = File(...),
+    callback_url: Optional[str] = Form(None),
+    deadline_at: Optional[datetime] = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
+    # Validate files are PDFs or zip archives of PDFs
+    for file in files:
+        if file.content_type != "application/pdf" and file.content_type not in ZIP_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail=f"{file.filename} must be a PDF or a zip archive")
+
+    # Resolves the host, so it runs in the thread pool
+    if callback_url is not None and not await run_in_threadpool(is_valid_callback_url, callback_url):
+        raise HTTPException(status_code=400, detail="callback_url must be an http(s) URL of a public host")
+
+    # (temp path, content hash) of every PDF in the batch
+    uploads = []
+
+    # Counted over all archives of the batch
+    zip_pdfs = 0
+    zip_bytes = 0
+
+    try:
+        try:
+            for file in files:
+                if file.content_type == "application/pdf":
+                    uploads.append(await save_upload_file(file))
+                    continue
+
+                zip_path, _ = await save_upload_file(file, settings.MAX_BATCH_UPLOAD_SIZE_BYTES)
+
+                try:
+                    extracted = await run_in_threadpool(
+                        extract_pdfs_from_zip,
+                        zip_path,
+                        settings.MAX_BATCH_ZIP_PDFS - zip_pdfs,
+                        settings.MAX_BATCH_ZIP_UNCOMPRESSED_BYTES - zip_bytes,
+                    )
+                finally:
+                    await run_in_threadpool(os.remove, zip_path)
+
+                uploads.extend((temp_path, content_hash) for _, temp_path, content_hash, _ in extracted)
+                zip_pdfs += len(extracted)
+                zip_bytes += sum(size for _, _, _, size in extracted)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except zipfile.BadZipFile as e:
+            raise HTTPException(status_code=400, detail=f"Invalid zip archive: {e}")
+
+        if not uploads:
+            raise HTTPException(status_code=400, detail="Batch does not contain any PDF")
+
+        deadline_at = normalize_deadline(deadline_at)
+
+        batch = Batch()
+        db.add(batch)
+        await db.flush()
+
+        # pdfinfo runs once per distinct file, for all files at the same time
+        first_paths = {}
+        for temp_path, content_hash in uploads:
+            first_paths.setdefault(content_hash, temp_path)
+
+        page_counts = dict(zip(
+            first_paths,
+            await asyncio.gather(*(
+                run_in_threadpool(pdf_page_count, temp_path)
+                for temp_path in first_paths.values()
+            )),
+        ))
+
+        config_version = get_config_version()
+        jobs = []
+
+        for temp_path, content_hash in uploads:
+            page_count = page_counts[content_hash]
+
+            jobs.append({
+                "batch_id": batch.id,
+                "content_hash": content_hash,
+                "config_version": config_version,
+                "callback_url": callback_url,
+                "page_count": page_count,
+                "deadline_at": deadline_at,
+                **job_route(page_count, deadline_at),
+            })
+
+        # Files that were already uploaded, or appear more than once in the batch,
+        # are linked to their original job and only processed once
+        job_ids, needs_processing = await insert_deduplicated_jobs(db, jobs)
+
+        await db.commit()
+
+        for job_id, (temp_path, _) in zip(job_ids, uploads):
+            await run_in_threadpool(os.replace, temp_path, job_file_path(job_id))
+    finally:
+        for temp_path, _ in uploads:
+            if await run_in_threadpool(os.path.exists, temp_path):
+                await run_in_threadpool(os.remove, temp_path)
+
+    # Send all tasks to the Celery workers at once, each to the lane of its page count
+    tasks = [
+        process_document_signature(job_id, job["queue"], job["priority"], job["task_id"])
+        for job_id, job, processing in zip(job_ids, jobs, needs_processing)
+        if processing
+    ]
+
+    if tasks:
+        group(tasks).apply_async()
+
+    # Results taken over from earlier jobs, nothing will complete these jobs later
+    if callback_url:
+        completed_job_ids = (await db.execute(
+            select(Job.id).where(Job.id.in_(job_ids), Job.status == JobStatus.completed)
+        )).scalars().all()
+
+        for job_id in completed_job_ids:
+            send_job_callback.delay(job_id)
+
+    return { "batch_id": batch.id, "job_ids": job_ids }
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: int, db: AsyncSession = Depends(get_db)):
+    batch = await db.get(Batch, batch_id)
+
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    result = await db.execute(
+        select(Job.id, Job.status)
+        .where(Job.batch_id == batch_id)
+        .order_by(Job.id)
+    )
+    jobs = result.all()
+
+    return {
+        "id": batch.id,
+        "created_at": batch.created_at,
+        **summarize_job_statuses({job.id: job.status.value for job in jobs}),
+        "jobs": [{ "id": job.id, "status": job.status } for job in jobs],
+    }
+
+@router.get("/batches/{batch_id}/events")
+async def get_batch_events(batch_id: int, db: AsyncSession = Depends(get_db)):
+    pubsub = await subscribe(batch_channel(batch_id))
+
+    try:
+        batch = await db.get(Batch, batch_id)
+
+        if batch:
+            result = await db.execute(select(Job.id, Job.status).where(Job.batch_id == batch_id))
+            statuses = {job.id: job.status.value for job in result.all()}
+    except Exception:
+        await close_subscription(pubsub)
+        raise
+
+    if not batch:
+        await close_subscription(pubsub)
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    return StreamingResponse(
+        stream_batch_events(pubsub, batch_id, statuses),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@router.get("/batches/{batch_id}/{format}")
+async def get_batch_result(batch_id: int, format: str, db: AsyncSession = Depends(get_db)):
+    batch = await db.get(Batch, batch_id)
+
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    start = time.perf_counter()
+
+    try:
+        exporter = ExportFactory.get_strategy(format)
+
+        # Positions of all completed jobs of the batch, ordered by job and position
+        export = await exporter.export_jobs(
+            f"batch_{batch_id}",
+            Job.batch_id == batch_id,
+            Job.status == JobStatus.completed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return observe_export(format, export, start)
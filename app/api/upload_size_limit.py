@@ -0,0 +1,55 @@
+from typing import Dict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.config.settings import settings
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps the request body of upload endpoints while it arrives. The multipart form
+    is parsed (and spooled to disk by Starlette) before the route runs, so a limit
+    checked in the route only applies once the whole body was received.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        # Body limit per POST path, multipart boundaries and form fields come on top
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the maximum upload size of {limit} bytes"
+        limit += settings.MULTIPART_OVERHEAD_BYTES
+
+        # Declared size, rejected before a single byte of the body is read
+        content_length = dict(scope["headers"]).get(b"content-length")
+
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            await response(scope, receive, send)
+            return
+
+        # Chunked bodies, or a Content-Length that understates the body
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+
+                if received > limit:
+                    # Raised while the form is parsed, FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=detail)
+
+            return message
+
+        await self.app(scope, limited_receive, send)
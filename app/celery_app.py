@@ -1,5 +1,6 @@
 from celery import Celery
 from app.config.settings import settings
+from app.services.job_routing import FAST_QUEUE, LOWEST_PRIORITY
 
 celery_app = Celery(
     "worker",
@@ -12,6 +13,25 @@ celery_app.conf.update(
     result_serializer="json",
     accept_content=["json"],
     task_track_started=True,
+    # Short tasks (callbacks, chord callbacks, promotion) share the fast lane
+    task_default_queue=FAST_QUEUE,
+    # One list per priority in Redis, always served from priority 0 down
+    broker_transport_options={
+        "priority_steps": list(range(LOWEST_PRIORITY + 1)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    # Prefetched messages would bypass the priorities
+    worker_prefetch_multiplier=1,
+    # Recycles children whose memory crept up (in KiB)
+    worker_max_memory_per_child=settings.WORKER_MAX_MEMORY_PER_CHILD_MB * 1024 or None,
+    worker_proc_alive_timeout=settings.WORKER_PROCESS_INIT_TIMEOUT_SECONDS,
+    beat_schedule={
+        "promote-due-jobs": {
+            "task": "app.worker.promote_due_jobs",
+            "schedule": settings.DEADLINE_PROMOTION_INTERVAL_SECONDS,
+        },
+    },
 )
 
 import app.worker 
\ No newline at end of file
@@ -5,6 +5,24 @@
 # Rescaled Image DPI for better OCR accuracy
 DPI = 300
 
+# Pages are rasterized lazily instead of all at once, so memory does not grow with page count
+RENDERING = {
+    # "gray" renders 8-bit grayscale PGM straight from pdftoppm into numpy,
+    # "rgb" renders RGB PNGs through pdf2image/PIL
+    "mode": "gray",
+    # Number of pages rendered per poppler call
+    "window_size": 1,
+    # Number of rendered pages buffered ahead of OCR (0 renders synchronously)
+    "lookahead": 2,
+    # Two-pass rendering, "gray" mode only: pages are first rendered at this DPI to find
+    # the table rows, then only the band of those rows is rendered at DPI and the rest
+    # of the page is left white (0 renders every page completely at DPI)
+    "coarse_dpi": 0,
+    # Rows after the table end found in the coarse pass that are rendered at DPI anyway,
+    # so the full resolution decides about rows the coarse pass could have missed
+    "coarse_margin_rows": 1,
+}
+
 # Gaussian blur kernel size for noise reduction before thresholding
 GAUSSIAN_BLUR_KERNEL = (5, 5)
 
@@ -14,6 +32,30 @@ ADAPTIVE_THRESHOLD = {
     "constant": 15,
 }
 
+PREPROCESSING = {
+    # "roi" blurs and thresholds only the (padded) field ROIs the layout reads,
+    # "full_page" binarizes the whole page
+    "mode": "roi",
+}
+
+################################################################################
+#                               Page Processing                                #
+################################################################################
+
+PAGE_PROCESSING = {
+    # Number of processes pages are spread over (1 processes pages sequentially).
+    # Daemonic processes cannot start them: the children of the default Celery prefork
+    # pool process pages sequentially. Run the worker with --pool=solo to use it there,
+    # large documents are spread over the cluster by the fan out below either way.
+    "max_workers": 1,
+    # Documents with at least this many pages (left to process) are split into
+    # Celery subtasks of `fan_out_range_size` pages, which run on any worker of
+    # the cluster. Their positions are stored at once when all ranges are done
+    # (0 disables the fan out)
+    "fan_out_min_pages": 20,
+    "fan_out_range_size": 5,
+}
+
 ################################################################################
 #                            Row Processing Thresholds                         #
 ################################################################################
@@ -85,4 +127,25 @@ FIELDS = [
 OCR = {
     "languages": "deu+eng",
     "min_confidence": 0.0,
+    # "tesserocr" keeps one Tesseract API handle per process (falls back to
+    # "pytesseract" if the binding is not installed), "pytesseract" spawns
+    # one tesseract process per field
+    "engine": "tesserocr",
+    # "cell" runs one OCR call per field ROI, "column" stacks all non-empty ROIs
+    # of a field on a page into one strip and runs a single OCR call for it
+    "batch_mode": "cell",
+    # Page segmentation mode used for column strips (6 = uniform block of text)
+    "strip_psm": 6,
+    # White padding between stacked ROIs in a column strip
+    "strip_separator_height": 40,
+}
+
+# Cache of OCR results per field ROI, keyed by the binarized pixels and OCR settings
+OCR_CACHE = {
+    "enabled": True,
+    # Entries kept in the in-process LRU tier
+    "max_entries": 10000,
+    # Shared tier in the Redis instance used by Celery
+    "redis_enabled": False,
+    "redis_ttl_seconds": 7 * 24 * 60 * 60,
 }
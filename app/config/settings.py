@@ -1,6 +1,8 @@
 """
 Configuration
 """
+from typing import List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -26,6 +28,56 @@ class Settings(BaseSettings):
     # Queue Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # File Storage Configuration
+    FILES_DIR: str = "/files"
+    MAX_UPLOAD_SIZE_BYTES: int = 100 * 1024 * 1024
+    MAX_BATCH_UPLOAD_SIZE_BYTES: int = 2 * 1024 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
+    # Limits of the PDFs unpacked from the zip archives of one batch
+    MAX_BATCH_ZIP_PDFS: int = 1000
+    MAX_BATCH_ZIP_UNCOMPRESSED_BYTES: int = 4 * 1024 * 1024 * 1024
+    # Allowed on top of the upload size for multipart boundaries, part headers and form fields
+    MULTIPART_OVERHEAD_BYTES: int = 64 * 1024
+
+    # Export Cache Configuration
+    EXPORT_CACHE_ENABLED: bool = True
+    EXPORT_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    # Larger exports are streamed without being cached
+    EXPORT_CACHE_MAX_BYTES: int = 20 * 1024 * 1024
+
+    # Job Processing Configuration
+    JOB_MAX_RETRIES: int = 3
+    # Retry n waits JOB_RETRY_BACKOFF_SECONDS * 2^n
+    JOB_RETRY_BACKOFF_SECONDS: int = 10
+    # Per-stage timings stored on the job and returned by GET /jobs/{job_id}
+    JOB_METRICS_ENABLED: bool = True
+
+    # Worker Process Configuration
+    # Children are replaced after a task that left them above this resident memory (0 disables)
+    WORKER_MAX_MEMORY_PER_CHILD_MB: int = 768
+    # Time a new child gets to start, including warming up the OCR engine
+    WORKER_PROCESS_INIT_TIMEOUT_SECONDS: float = 60.0
+
+    # Metrics Configuration
+    # Port of the Prometheus exporter in the Celery main process (0 disables)
+    WORKER_METRICS_PORT: int = 9100
+
+    # Job Routing Configuration
+    FAST_QUEUE_MAX_PAGES: int = 5
+    # Pending jobs whose deadline is this close are moved to the front of the fast lane
+    DEADLINE_PROMOTION_SECONDS: int = 5 * 60
+    DEADLINE_PROMOTION_INTERVAL_SECONDS: float = 30.0
+
+    # Job Notification Configuration
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_RETRIES: int = 6
+    # Retry n waits WEBHOOK_RETRY_BACKOFF_SECONDS * 2^n
+    WEBHOOK_RETRY_BACKOFF_SECONDS: int = 5
+    # Hosts callbacks may be sent to (JSON list). Empty allows any host that
+    # resolves to public addresses only.
+    WEBHOOK_ALLOWED_HOSTS: List[str] = []
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
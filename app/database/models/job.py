@@ -2,9 +2,14 @@ import enum
 from sqlalchemy import (
     Column,
     Integer,
+    String,
     Text,
     DateTime,
     Enum,
+    ForeignKey,
+    Index,
+    JSON,
+    text,
 )
 from sqlalchemy.sql import func
 from app.database.base import Base
@@ -19,6 +24,20 @@ class JobStatus(str, enum.Enum):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Scanned by the deadline promotion
+        Index(
+            "ix_jobs_pending_deadline_at",
+            "deadline_at",
+            postgresql_where=text("status = 'pending' AND deadline_at IS NOT NULL"),
+        ),
+        # Counted on every metrics scrape, stays as small as the jobs in flight
+        Index(
+            "ix_jobs_active_status",
+            "status",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -30,6 +49,36 @@ class Job(Base):
 
     error = Column(Text, nullable=True)
 
+    # Pages whose positions are committed, processing resumes after them
+    pages_processed = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # SHA-256 of the uploaded PDF and the layout/OCR config it was processed with
+    content_hash = Column(String(64), nullable=True, index=True)
+    config_version = Column(String(64), nullable=True)
+
+    # Set if the result was (or will be) taken over from an earlier job for the same file
+    duplicate_of_id = Column(Integer, ForeignKey("jobs.id"), nullable=True)
+
+    # Set for jobs that were submitted together through POST /batches
+    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=True, index=True)
+
+    # Read at intake without rasterizing, decides the queue the job is routed to
+    page_count = Column(Integer, nullable=True)
+    # Optional SLA, pending jobs close to it are promoted
+    deadline_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Lane and priority the job was last enqueued with, and the ID of that Celery task.
+    # Messages with another task ID (replaced by a promotion) are dropped by the worker.
+    queue = Column(String(16), nullable=True)
+    priority = Column(Integer, nullable=True)
+    task_id = Column(String(36), nullable=True)
+
+    # Receives a POST with the job status once the job is completed or failed
+    callback_url = Column(Text, nullable=True)
+
+    # Wall time, CPU time, calls, pages and peak memory per processing stage
+    metrics = Column(JSON, nullable=True)
+
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from app.config.settings import settings
+
+_client: Optional[redis.Redis] = None
+_client_pid: Optional[int] = None
+
+_async_client: Optional[redis.asyncio.Redis] = None
+
+def get_redis() -> redis.Redis:
+    global _client, _client_pid
+
+    # Connections must not be shared with forked children
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+        _client_pid = os.getpid()
+
+    return _client
+
+def get_async_redis() -> redis.asyncio.Redis:
+    global _async_client
+
+    if _async_client is None:
+        _async_client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+
+    return _async_client
@@ -3,5 +3,10 @@ from sqlalchemy.orm import sessionmaker
 
 from app.config.settings import settings
 
-engine = create_engine(settings.SYNC_DATABASE_URL, pool_pre_ping=True)
+# Bulk inserts (executemany) are sent as multi-row INSERT ... VALUES statements
+engine = create_engine(
+    settings.SYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    insertmanyvalues_page_size=5000,
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import routes
+from app.api.upload_size_limit import UploadSizeLimitMiddleware
 from app.config.settings import settings
 
 app = FastAPI(
@@ -10,6 +11,16 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Oversized uploads are rejected while they arrive, before the form is parsed.
+# Added first so it runs inside CORS and its 413 gets the CORS headers too
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/jobs": settings.MAX_UPLOAD_SIZE_BYTES,
+        "/batches": settings.MAX_BATCH_UPLOAD_SIZE_BYTES,
+    },
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,222 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.models.extraction_result import ExtractionResult
+from app.database.models.job import Job, JobStatus
+from app.database.models.order_position import OrderPosition
+
+def lock_content_hash(content_hash: str):
+    # Transaction level advisory lock, so a job for a hash is either
+    # linked to an in-flight job or sees its completed result, never neither
+    key = int.from_bytes(bytes.fromhex(content_hash[:16]), "big", signed=True)
+
+    return select(func.pg_advisory_xact_lock(key))
+
+def find_original_job(content_hash: str, config_version: str):
+    # Completed jobs are preferred, otherwise the newest job still in flight
+    return (
+        select(Job)
+        .where(
+            Job.content_hash == content_hash,
+            Job.config_version == config_version,
+            Job.duplicate_of_id.is_(None),
+            Job.status != JobStatus.failed,
+        )
+        .order_by(
+            case((Job.status == JobStatus.completed, 0), else_=1),
+            Job.id.desc(),
+        )
+        .limit(1)
+    )
+
+def copy_extraction_result(source_job_id: int, target_job_id: int):
+    return (
+        insert(ExtractionResult)
+        .from_select(
+            ["job_id", "total_pages"],
+            select(literal(target_job_id), ExtractionResult.total_pages)
+            .where(ExtractionResult.job_id == source_job_id),
+        )
+        .returning(ExtractionResult.id)
+    )
+
+def copy_order_positions(source_job_id: int, target_extraction_result_id: int):
+    columns = [
+        column
+        for column in OrderPosition.__table__.columns
+        if column.name not in ("id", "extraction_result_id")
+    ]
+
+    source_extraction_result_id = (
+        select(ExtractionResult.id)
+        .where(ExtractionResult.job_id == source_job_id)
+        .scalar_subquery()
+    )
+
+    return insert(OrderPosition).from_select(
+        ["extraction_result_id", *[column.name for column in columns]],
+        select(literal(target_extraction_result_id), *columns)
+        .where(OrderPosition.extraction_result_id == source_extraction_result_id),
+    )
+
+async def deduplicate_job(db: AsyncSession, job: Job) -> bool:
+    """
+    Links a new (not yet flushed) job to an earlier job for the same file and
+    config version. Returns True if the job still has to be processed.
+    The caller commits, which releases the lock.
+    """
+    await db.execute(lock_content_hash(job.content_hash))
+
+    original: Optional[Job] = (
+        await db.execute(find_original_job(job.content_hash, job.config_version))
+    ).scalar_one_or_none()
+
+    if original is None:
+        db.add(job)
+        await db.flush()
+        return True
+
+    if original.status != JobStatus.completed:
+        # Coalesce onto the in-flight job, the worker completes this one with it
+        job.duplicate_of_id = original.id
+        db.add(job)
+        await db.flush()
+        return False
+
+    now = datetime.now(timezone.utc)
+    job.duplicate_of_id = original.id
+    job.status = JobStatus.completed
+    job.pages_processed = original.pages_processed
+    job.started_at = now
+    job.completed_at = now
+    db.add(job)
+    await db.flush()
+
+    extraction_result_id = (
+        await db.execute(copy_extraction_result(original.id, job.id))
+    ).scalar_one()
+    await db.execute(copy_order_positions(original.id, extraction_result_id))
+
+    return False
+
+async def insert_deduplicated_jobs(
+    db: AsyncSession, jobs: List[Dict[str, Any]]
+) -> Tuple[List[int], List[bool]]:
+    """
+    Bulk inserts the jobs of a batch (column values, not yet linked), deduplicated
+    like deduplicate_job. Files without an earlier job are linked to their first job
+    in the batch. Returns the job IDs in the order of `jobs` and whether each job has
+    to be processed. The caller commits, which releases the locks.
+    """
+    # Always locked in the same order, so two batches cannot deadlock
+    for content_hash in sorted({job["content_hash"] for job in jobs}):
+        await db.execute(lock_content_hash(content_hash))
+
+    originals: Dict[Tuple[str, str], Optional[Job]] = {}
+
+    for job in jobs:
+        key = (job["content_hash"], job["config_version"])
+
+        if key not in originals:
+            originals[key] = (
+                await db.execute(find_original_job(*key))
+            ).scalar_one_or_none()
+
+    job_ids: List[Optional[int]] = [None] * len(jobs)
+    needs_processing = [False] * len(jobs)
+
+    # The first job of every new file is processed, in one INSERT
+    first_indexes: Dict[Tuple[str, str], int] = {}
+
+    for index, job in enumerate(jobs):
+        key = (job["content_hash"], job["config_version"])
+
+        if originals[key] is None and key not in first_indexes:
+            first_indexes[key] = index
+
+    if first_indexes:
+        indexes = sorted(first_indexes.values())
+        result = await db.execute(
+            insert(Job).returning(Job.id, sort_by_parameter_order=True),
+            [jobs[index] for index in indexes],
+        )
+
+        for index, job_id in zip(indexes, result.scalars().all()):
+            job_ids[index] = job_id
+            needs_processing[index] = True
+
+    # Every other job is a duplicate, in a second INSERT. Duplicates of a completed
+    # job are completed right away and get a copy of its result.
+    now = datetime.now(timezone.utc)
+    duplicates = []
+
+    for index, job in enumerate(jobs):
+        if job_ids[index] is not None:
+            continue
+
+        key = (job["content_hash"], job["config_version"])
+        original = originals[key]
+
+        if original is None:
+            duplicate_of_id = job_ids[first_indexes[key]]
+        else:
+            duplicate_of_id = original.id
+
+        completed = original is not None and original.status == JobStatus.completed
+
+        duplicates.append((index, original if completed else None, {
+            **job,
+            "duplicate_of_id": duplicate_of_id,
+            "status": JobStatus.completed if completed else JobStatus.pending,
+            "pages_processed": original.pages_processed if completed else 0,
+            "started_at": now if completed else None,
+            "completed_at": now if completed else None,
+        }))
+
+    if duplicates:
+        result = await db.execute(
+            insert(Job).returning(Job.id, sort_by_parameter_order=True),
+            [values for _, _, values in duplicates],
+        )
+
+        for (index, completed_original, _), job_id in zip(duplicates, result.scalars().all()):
+            job_ids[index] = job_id
+
+            if completed_original is not None:
+                extraction_result_id = (
+                    await db.execute(copy_extraction_result(completed_original.id, job_id))
+                ).scalar_one()
+                await db.execute(copy_order_positions(completed_original.id, extraction_result_id))
+
+    return job_ids, needs_processing
+
+def complete_duplicate_jobs(db: Session, job: Job) -> List[Job]:
+    # Must run in the transaction that completes or fails `job`
+    # (with its result already flushed). Returns the jobs it completed.
+    db.execute(lock_content_hash(job.content_hash))
+
+    duplicates = db.execute(
+        select(Job).where(
+            Job.duplicate_of_id == job.id,
+            Job.status == JobStatus.pending,
+        )
+    ).scalars().all()
+
+    for duplicate in duplicates:
+        duplicate.status = job.status
+        duplicate.error = job.error
+        duplicate.started_at = job.started_at
+        duplicate.completed_at = job.completed_at
+
+        if job.status == JobStatus.completed:
+            duplicate.pages_processed = job.pages_processed
+            extraction_result_id = db.execute(
+                copy_extraction_result(job.id, duplicate.id)
+            ).scalar_one()
+            db.execute(copy_order_positions(job.id, extraction_result_id))
+
+    return duplicates
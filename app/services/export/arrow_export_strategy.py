@@ -0,0 +1,11 @@
+import pyarrow as pa
+
+from app.services.export.columnar_export_strategy import SCHEMA, ColumnarExportStrategy
+
+class ArrowExportStrategy(ColumnarExportStrategy):
+    media_type = "application/vnd.apache.arrow.stream"
+    extension = "arrows"
+
+    def _open_writer(self, sink):
+        # IPC streaming format, readable with pyarrow.ipc.open_stream
+        return pa.ipc.new_stream(sink, SCHEMA)
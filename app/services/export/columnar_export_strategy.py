@@ -0,0 +1,112 @@
+from abc import abstractmethod
+from typing import Any, AsyncIterator, List, Sequence
+
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, Select
+
+from app.database.models.order_position import OrderPosition
+from app.services.export.export_strategy import ExportStrategy
+from app.services.export.position_stream import select_order_position_columns, stream_rows
+
+# Rows per record batch (and Parquet row group)
+RECORD_BATCH_SIZE = 50000
+
+SCHEMA = pa.schema([
+    ("job_id", pa.int32()),
+    ("position_number", pa.int32()),
+    ("article_number", pa.string()),
+    ("article_number_confidence", pa.float64()),
+    ("description", pa.string()),
+    ("description_confidence", pa.float64()),
+    ("kvk", pa.float64()),
+    ("kvk_confidence", pa.float64()),
+    ("wgp", pa.float64()),
+    ("wgp_confidence", pa.float64()),
+])
+
+class _ChunkSink:
+    """
+    File-like object the pyarrow writers write into. Whatever was written
+    since the last drain is handed to the response, so only one record batch
+    is held in memory at a time.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class ColumnarExportStrategy(ExportStrategy):
+    media_type: str
+    extension: str
+
+    async def export(self, job_id: int, extraction_result):
+        return self._response(
+            f"job_{job_id}",
+            select_order_position_columns(
+                OrderPosition.extraction_result_id == extraction_result.id
+            ),
+        )
+
+    async def export_jobs(self, name: str, *criteria: Any):
+        return self._response(name, select_order_position_columns(*criteria))
+
+    @abstractmethod
+    def _open_writer(self, sink: _ChunkSink):
+        pass
+
+    def _response(self, name: str, statement: Select) -> StreamingResponse:
+        return StreamingResponse(
+            self._stream(statement),
+            media_type=self.media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename={name}.{self.extension}"
+            },
+        )
+
+    async def _stream(self, statement: Select) -> AsyncIterator[bytes]:
+        sink = _ChunkSink()
+        writer = self._open_writer(sink)
+
+        async for rows in stream_rows(statement, batch_size=RECORD_BATCH_SIZE):
+            writer.write_batch(self._to_record_batch(rows))
+
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def _to_record_batch(rows: Sequence[Row]) -> pa.RecordBatch:
+        columns = list(zip(*rows))
+
+        return pa.RecordBatch.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(columns, SCHEMA)
+            ],
+            schema=SCHEMA,
+        )
@@ -1,34 +1,79 @@
 import csv
 import io
+from typing import Any, AsyncIterator
+
 from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
 
 from app.services.export.export_strategy import ExportStrategy
+from app.services.export.position_stream import (
+    select_order_position_columns,
+    select_order_positions,
+    stream_order_positions,
+    stream_rows,
+)
 
-class CsvExportStrategy(ExportStrategy):
-    def export(self, job_id: int, extraction_result):
-        buffer = io.StringIO()
-        writer = csv.writer(buffer)
+HEADER = [
+    "article_number", "article_number_confidence",
+    "description", "description_confidence",
+    "kvk", "kvk_confidence",
+    "wgp", "wgp_confidence"
+]
 
-        writer.writerow([
-            "article_number", "article_number_confidence",
-            "description", "description_confidence",
-            "kvk", "kvk_confidence",
-            "wgp", "wgp_confidence"
-        ])
-
-        for pos in extraction_result.positions:
-            writer.writerow([
-                pos.article_number_value, pos.article_number_confidence,
-                pos.description_value, pos.description_confidence,
-                pos.kvk_value, pos.kvk_confidence,
-                pos.wgp_value, pos.wgp_confidence
-            ])
-
-        buffer.seek(0)
+class CsvExportStrategy(ExportStrategy):
+    async def export(self, job_id: int, extraction_result):
         return StreamingResponse(
-            buffer,
+            self._stream_rows(extraction_result.id),
             media_type="text/csv",
             headers={
                 "Content-Disposition": f"attachment; filename=job_{job_id}.csv"
             },
         )
+
+    async def export_jobs(self, name: str, *criteria: Any):
+        return StreamingResponse(
+            self._stream_job_rows(select_order_position_columns(*criteria)),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f"attachment; filename={name}.csv"
+            },
+        )
+
+    async def _stream_rows(self, extraction_result_id: int) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(HEADER)
+
+        # The header goes out before the first batch is fetched
+        yield self._drain(buffer)
+
+        async for positions in stream_order_positions(select_order_positions(extraction_result_id)):
+            for pos in positions:
+                writer.writerow([
+                    pos.article_number_value, pos.article_number_confidence,
+                    pos.description_value, pos.description_confidence,
+                    pos.kvk_value, pos.kvk_confidence,
+                    pos.wgp_value, pos.wgp_confidence
+                ])
+
+            yield self._drain(buffer)
+
+    async def _stream_job_rows(self, statement: Select) -> AsyncIterator[bytes]:
+        # Same columns as the export of a single job, led by the job and position number
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(["job_id", "position_number", *HEADER])
+        yield self._drain(buffer)
+
+        async for rows in stream_rows(statement):
+            writer.writerows(rows)
+            yield self._drain(buffer)
+
+    @staticmethod
+    def _drain(buffer: io.StringIO) -> bytes:
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
@@ -0,0 +1,166 @@
+"""
+Serialized exports of completed jobs, gzip compressed in Redis and keyed by
+job ID, format and result version (the ID of the job's ExtractionResult).
+A result never changes once its job is completed, and partial results of
+running jobs are never cached, so entries are never invalidated, they expire.
+"""
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from app.config.settings import settings
+from app.database.redis_client import get_async_redis
+
+@dataclass
+class CachedExport:
+    body: bytes
+    etag: str
+    media_type: str
+    content_disposition: Optional[str]
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            media_type=self.media_type,
+            headers=self.headers(),
+        )
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag}
+
+        if self.content_disposition:
+            headers["Content-Disposition"] = self.content_disposition
+
+        return headers
+
+def _key(job_id: int, format: str, result_version: int) -> str:
+    return f"export:{job_id}:{format}:{result_version}"
+
+def compute_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+
+    # If-None-Match uses the weak comparison
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+async def get_cached_export(job_id: int, format: str, result_version: int) -> Optional[CachedExport]:
+    if not settings.EXPORT_CACHE_ENABLED:
+        return None
+
+    try:
+        entry = await get_async_redis().hgetall(_key(job_id, format, result_version))
+    except Exception as e:
+        print(f"Export cache: Redis lookup failed: {e}")
+        return None
+
+    if not entry:
+        return None
+
+    return CachedExport(
+        body=gzip.decompress(entry[b"body"]),
+        etag=entry[b"etag"].decode(),
+        media_type=entry[b"media_type"].decode(),
+        content_disposition=entry[b"content_disposition"].decode() or None,
+    )
+
+async def store_export(
+    job_id: int, format: str, result_version: int, body: bytes, media_type: str, content_disposition: Optional[str]
+) -> CachedExport:
+    cached_export = CachedExport(
+        body=body,
+        etag=compute_etag(body),
+        media_type=media_type,
+        content_disposition=content_disposition,
+    )
+
+    if not settings.EXPORT_CACHE_ENABLED or len(body) > settings.EXPORT_CACHE_MAX_BYTES:
+        return cached_export
+
+    key = _key(job_id, format, result_version)
+
+    try:
+        client = get_async_redis()
+        await client.hset(key, mapping={
+            "body": gzip.compress(body),
+            "etag": cached_export.etag,
+            "media_type": media_type,
+            "content_disposition": content_disposition or "",
+        })
+        await client.expire(key, settings.EXPORT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"Export cache: Redis write failed: {e}")
+
+    return cached_export
+
+async def cache_export_response(
+    job_id: int, format: str, result_version: int, export: Any
+) -> Response:
+    """
+    Stores the output of an export strategy and returns the response to send.
+    Streaming exports are passed through to the client and stored once they were
+    sent completely (and are small enough), so the first response has no ETag.
+    """
+    if isinstance(export, StreamingResponse):
+        export.body_iterator = _tee_into_cache(
+            job_id, format, result_version, export, export.body_iterator
+        )
+        return export
+
+    if not isinstance(export, Response):
+        export = JSONResponse(content=jsonable_encoder(export))
+
+    cached_export = await store_export(
+        job_id,
+        format,
+        result_version,
+        export.body,
+        export.media_type,
+        export.headers.get("content-disposition"),
+    )
+
+    return cached_export.to_response()
+
+async def _tee_into_cache(
+    job_id: int,
+    format: str,
+    result_version: int,
+    export: StreamingResponse,
+    body_iterator: AsyncIterator[Any],
+) -> AsyncIterator[bytes]:
+    chunks: Optional[list] = [] if settings.EXPORT_CACHE_ENABLED else None
+    size = 0
+
+    async for chunk in body_iterator:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+
+        if chunks is not None:
+            chunks.append(chunk)
+            size += len(chunk)
+
+            # Too large to be cached, stop buffering
+            if size > settings.EXPORT_CACHE_MAX_BYTES:
+                chunks = None
+
+        yield chunk
+
+    if chunks is not None:
+        await store_export(
+            job_id,
+            format,
+            result_version,
+            b"".join(chunks),
+            export.media_type,
+            export.headers.get("content-disposition"),
+        )
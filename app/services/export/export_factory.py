@@ -1,11 +1,17 @@
+from app.services.export.arrow_export_strategy import ArrowExportStrategy
 from app.services.export.csv_export_strategy import CsvExportStrategy
 from app.services.export.export_strategy import ExportStrategy
 from app.services.export.json_export_strategy import JsonExportStrategy
+from app.services.export.ndjson_export_strategy import NdjsonExportStrategy
+from app.services.export.parquet_export_strategy import ParquetExportStrategy
 
 class ExportFactory:
     _strategies = {
         "json": JsonExportStrategy(),
         "csv": CsvExportStrategy(),
+        "ndjson": NdjsonExportStrategy(),
+        "parquet": ParquetExportStrategy(),
+        "arrow": ArrowExportStrategy(),
     }
 
     @classmethod
@@ -3,5 +3,9 @@ from typing import Any
 
 class ExportStrategy(ABC):
     @abstractmethod
-    def export(self, job_id: int, extraction_result) -> Any:
-        pass
\ No newline at end of file
+    async def export(self, job_id: int, extraction_result) -> Any:
+        pass
+
+    async def export_jobs(self, name: str, *criteria: Any) -> Any:
+        # Export of the positions of all jobs matching `criteria` (on Job)
+        raise ValueError("Export format does not support exporting multiple jobs")
@@ -1,29 +1,82 @@
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
 from app.services.export.export_strategy import ExportStrategy
+from app.services.export.position_stream import (
+    select_order_position_columns,
+    select_order_positions,
+    stream_order_positions,
+    stream_rows,
+)
 
 class JsonExportStrategy(ExportStrategy):
-    def export(self, job_id: int, extraction_result):
+    async def export(self, job_id: int, extraction_result):
+        positions = []
+
+        async for batch in stream_order_positions(select_order_positions(extraction_result.id)):
+            positions.extend(batch)
+
         return {
             "job_id": job_id,
             "total_pages": extraction_result.total_pages,
-            "positions": [
-                {
-                    "article_number": {
-                        "value": pos.article_number_value,
-                        "confidence": pos.article_number_confidence,
-                    },
-                    "description": {
-                        "value": pos.description_value,
-                        "confidence": pos.description_confidence,
-                    },
-                    "kvk": {
-                        "value": pos.kvk_value,
-                        "confidence": pos.kvk_confidence
-                    },
-                    "wgp": {
-                        "value": pos.wgp_value,
-                        "confidence": pos.wgp_confidence
-                    }
-                }
-                for pos in extraction_result.positions
-            ],
+            "positions": [self._serialize_position(pos) for pos in positions],
+        }
+
+    async def export_jobs(self, name: str, *criteria: Any):
+        # One document for all jobs, written while the positions are read
+        return StreamingResponse(
+            self._stream_jobs(select_order_position_columns(*criteria)),
+            media_type="application/json",
+            headers={
+                "Content-Disposition": f"attachment; filename={name}.json"
+            },
+        )
+
+    async def _stream_jobs(self, statement: Select) -> AsyncIterator[bytes]:
+        # {"jobs": [{"job_id": ..., "positions": [...]}, ...]}, rows arrive ordered by job
+        yield b'{"jobs":['
+
+        current_job_id = None
+
+        async for rows in stream_rows(statement):
+            chunk = []
+
+            for row in rows:
+                if row.job_id != current_job_id:
+                    if current_job_id is not None:
+                        chunk.append(b"]},")
+
+                    chunk.append(b'{"job_id":%d,"positions":[' % row.job_id)
+                    current_job_id = row.job_id
+                else:
+                    chunk.append(b",")
+
+                chunk.append(orjson.dumps(self._serialize_position(row)))
+
+            yield b"".join(chunk)
+
+        yield b"]}]}" if current_job_id is not None else b"]}"
+
+    @staticmethod
+    def _serialize_position(pos) -> dict:
+        return {
+            "article_number": {
+                "value": pos.article_number_value,
+                "confidence": pos.article_number_confidence,
+            },
+            "description": {
+                "value": pos.description_value,
+                "confidence": pos.description_confidence,
+            },
+            "kvk": {
+                "value": pos.kvk_value,
+                "confidence": pos.kvk_confidence
+            },
+            "wgp": {
+                "value": pos.wgp_value,
+                "confidence": pos.wgp_confidence
+            }
         }
@@ -0,0 +1,60 @@
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.database.models.order_position import OrderPosition
+from app.services.export.export_strategy import ExportStrategy
+from app.services.export.position_stream import select_order_position_columns, stream_rows
+
+class NdjsonExportStrategy(ExportStrategy):
+    async def export(self, job_id: int, extraction_result):
+        return self._response(
+            f"job_{job_id}",
+            select_order_position_columns(
+                OrderPosition.extraction_result_id == extraction_result.id
+            ),
+        )
+
+    async def export_jobs(self, name: str, *criteria: Any):
+        return self._response(name, select_order_position_columns(*criteria))
+
+    def _response(self, name: str, statement: Select) -> StreamingResponse:
+        return StreamingResponse(
+            self._stream_lines(statement),
+            media_type="application/x-ndjson",
+            headers={
+                "Content-Disposition": f"attachment; filename={name}.ndjson"
+            },
+        )
+
+    async def _stream_lines(self, statement: Select) -> AsyncIterator[bytes]:
+        async for rows in stream_rows(statement):
+            yield b"".join(
+                orjson.dumps(self._serialize_position(row), option=orjson.OPT_APPEND_NEWLINE)
+                for row in rows
+            )
+
+    @staticmethod
+    def _serialize_position(row) -> dict:
+        return {
+            "job_id": row.job_id,
+            "position_number": row.position_number,
+            "article_number": {
+                "value": row.article_number_value,
+                "confidence": row.article_number_confidence,
+            },
+            "description": {
+                "value": row.description_value,
+                "confidence": row.description_confidence,
+            },
+            "kvk": {
+                "value": row.kvk_value,
+                "confidence": row.kvk_confidence
+            },
+            "wgp": {
+                "value": row.wgp_value,
+                "confidence": row.wgp_confidence
+            }
+        }
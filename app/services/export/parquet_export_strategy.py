@@ -0,0 +1,11 @@
+import pyarrow.parquet as pq
+
+from app.services.export.columnar_export_strategy import SCHEMA, ColumnarExportStrategy
+
+class ParquetExportStrategy(ColumnarExportStrategy):
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def _open_writer(self, sink):
+        # Every record batch becomes one row group
+        return pq.ParquetWriter(sink, SCHEMA, compression="zstd")
@@ -0,0 +1,64 @@
+from typing import Any, AsyncIterator, List, Sequence
+
+from sqlalchemy import Row, Select, select
+
+from app.database.async_session import AsyncSessionLocal
+from app.database.models.extraction_result import ExtractionResult
+from app.database.models.job import Job
+from app.database.models.order_position import OrderPosition
+
+# Number of positions fetched from the server side cursor at a time
+POSITION_BATCH_SIZE = 1000
+
+def select_order_positions(extraction_result_id: int) -> Select:
+    return (
+        select(OrderPosition)
+        .where(OrderPosition.extraction_result_id == extraction_result_id)
+        .order_by(OrderPosition.position_number)
+    )
+
+def select_order_position_columns(*criteria: Any) -> Select:
+    # Plain columns of the positions (with their job ID), no ORM objects.
+    # `criteria` can filter on OrderPosition, ExtractionResult and Job.
+    return (
+        select(
+            ExtractionResult.job_id,
+            OrderPosition.position_number,
+            OrderPosition.article_number_value,
+            OrderPosition.article_number_confidence,
+            OrderPosition.description_value,
+            OrderPosition.description_confidence,
+            OrderPosition.kvk_value,
+            OrderPosition.kvk_confidence,
+            OrderPosition.wgp_value,
+            OrderPosition.wgp_confidence,
+        )
+        .join(ExtractionResult, OrderPosition.extraction_result_id == ExtractionResult.id)
+        .join(Job, ExtractionResult.job_id == Job.id)
+        .where(*criteria)
+        .order_by(ExtractionResult.job_id, OrderPosition.position_number)
+    )
+
+async def stream_order_positions(
+    statement: Select, batch_size: int = POSITION_BATCH_SIZE
+) -> AsyncIterator[List[OrderPosition]]:
+    # Uses its own session, the response body is streamed after the
+    # request scoped session may already be closed
+    async with AsyncSessionLocal() as session:
+        result = await session.stream_scalars(
+            statement.execution_options(yield_per=batch_size)
+        )
+
+        async for batch in result.partitions():
+            yield batch
+
+async def stream_rows(
+    statement: Select, batch_size: int = POSITION_BATCH_SIZE
+) -> AsyncIterator[Sequence[Row]]:
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            statement.execution_options(yield_per=batch_size)
+        )
+
+        async for batch in result.partitions():
+            yield batch
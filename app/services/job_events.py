@@ -0,0 +1,187 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.config.settings import settings
+from app.database.models.job import JobStatus
+from app.database.redis_client import get_async_redis, get_redis
+
+FINISHED_STATUSES = {JobStatus.completed.value, JobStatus.failed.value}
+
+def job_channel(job_id: int) -> str:
+    return f"events:job:{job_id}"
+
+def batch_channel(batch_id: int) -> str:
+    return f"events:batch:{batch_id}"
+
+def publish_job_event(job_id: int, batch_id: Optional[int], event_type: str, **data: Any) -> None:
+    """
+    Publishes a job event to the job channel and, for batch jobs, to the batch channel.
+    Events are fire and forget, a lost event must never fail the job itself.
+    """
+    message = json.dumps({"type": event_type, "job_id": job_id, **data}, default=str)
+
+    try:
+        redis_client = get_redis()
+        redis_client.publish(job_channel(job_id), message)
+
+        if batch_id is not None:
+            redis_client.publish(batch_channel(batch_id), message)
+    except Exception as e:
+        print(f"Job events: publishing {event_type} for job {job_id} failed: {e}")
+
+def processed_pages_key(job_id: int) -> str:
+    return f"events:job:{job_id}:pages_processed"
+
+def job_failed_key(job_id: int) -> str:
+    return f"events:job:{job_id}:failed"
+
+# Page counters and failed flags outlive any document
+EVENT_STATE_TTL_SECONDS = 24 * 60 * 60
+
+def reset_processed_pages(job_id: int, pages_processed: int) -> None:
+    # Counts the pages of a document whose page ranges run in separate tasks,
+    # as a set of page indexes, so a redelivered range does not count twice
+    try:
+        pipeline = get_redis().pipeline()
+        pipeline.delete(processed_pages_key(job_id), job_failed_key(job_id))
+
+        if pages_processed:
+            pipeline.sadd(processed_pages_key(job_id), *range(pages_processed))
+            pipeline.expire(processed_pages_key(job_id), EVENT_STATE_TTL_SECONDS)
+
+        pipeline.execute()
+    except Exception as e:
+        print(f"Job events: resetting the page counter of job {job_id} failed: {e}")
+
+def publish_page_processed(
+    job_id: int, batch_id: Optional[int], page_index: int, total_pages: int
+) -> None:
+    try:
+        pipeline = get_redis().pipeline()
+        pipeline.sadd(processed_pages_key(job_id), page_index)
+        pipeline.scard(processed_pages_key(job_id))
+        pipeline.expire(processed_pages_key(job_id), EVENT_STATE_TTL_SECONDS)
+        _, pages_processed, _ = pipeline.execute()
+    except Exception as e:
+        print(f"Job events: counting a page of job {job_id} failed: {e}")
+        return
+
+    publish_job_event(
+        job_id,
+        batch_id,
+        "progress",
+        pages_processed=pages_processed,
+        total_pages=total_pages,
+    )
+
+def mark_job_failed(job_id: int) -> None:
+    # Tells the page ranges of a failed document to stop
+    try:
+        get_redis().set(job_failed_key(job_id), 1, ex=EVENT_STATE_TTL_SECONDS)
+    except Exception as e:
+        print(f"Job events: marking job {job_id} as failed failed: {e}")
+
+def is_job_failed(job_id: int) -> bool:
+    # Without Redis the range keeps going, finalize_document drops the result
+    try:
+        return bool(get_redis().exists(job_failed_key(job_id)))
+    except Exception as e:
+        print(f"Job events: reading the failed flag of job {job_id} failed: {e}")
+        return False
+
+async def subscribe(channel: str):
+    # Subscribe before reading the current state from the database,
+    # so no transition between the read and the subscription is lost
+    pubsub = get_async_redis().pubsub()
+    await pubsub.subscribe(channel)
+
+    return pubsub
+
+async def close_subscription(pubsub) -> None:
+    await pubsub.unsubscribe()
+    await pubsub.aclose()
+
+async def iter_events(pubsub) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    # Yields None whenever no event arrived within the keep-alive interval
+    while True:
+        message = await pubsub.get_message(
+            ignore_subscribe_messages=True,
+            timeout=settings.EVENTS_KEEPALIVE_SECONDS,
+        )
+
+        yield json.loads(message["data"]) if message is not None else None
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+# Comment line, keeps proxies from closing an idle stream
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+def summarize_job_statuses(statuses: Dict[int, str]) -> Dict[str, Any]:
+    status_counts = {status.value: 0 for status in JobStatus}
+    for status in statuses.values():
+        status_counts[status] += 1
+
+    finished_jobs = sum(status_counts[status] for status in FINISHED_STATUSES)
+
+    return {
+        "total_jobs": len(statuses),
+        "status_counts": status_counts,
+        "progress": finished_jobs / len(statuses) if statuses else 1.0,
+    }
+
+async def stream_job_events(pubsub, current_event: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Server-Sent Events of a job, starting with its current status from the
+    database. Ends once the job is completed or failed.
+    """
+    try:
+        yield format_sse(current_event)
+
+        if current_event["status"] in FINISHED_STATUSES:
+            return
+
+        async for event in iter_events(pubsub):
+            if event is None:
+                yield SSE_KEEPALIVE
+                continue
+
+            yield format_sse(event)
+
+            if event["type"] == "status" and event["status"] in FINISHED_STATUSES:
+                return
+    finally:
+        await close_subscription(pubsub)
+
+async def stream_batch_events(pubsub, batch_id: int, statuses: Dict[int, str]) -> AsyncIterator[str]:
+    """
+    Server-Sent Events of all jobs of a batch, framed by a batch summary at the
+    start and once every job is completed or failed.
+    """
+    def batch_event() -> Dict[str, Any]:
+        return {"type": "batch", "batch_id": batch_id, **summarize_job_statuses(statuses)}
+
+    def is_finished() -> bool:
+        return all(status in FINISHED_STATUSES for status in statuses.values())
+
+    try:
+        yield format_sse(batch_event())
+
+        if is_finished():
+            return
+
+        async for event in iter_events(pubsub):
+            if event is None:
+                yield SSE_KEEPALIVE
+                continue
+
+            yield format_sse(event)
+
+            if event["type"] == "status" and event["job_id"] in statuses:
+                statuses[event["job_id"]] = event["status"]
+
+                if is_finished():
+                    yield format_sse(batch_event())
+                    return
+    finally:
+        await close_subscription(pubsub)
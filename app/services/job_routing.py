@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.config.settings import settings
+
+# Dedicated worker pools subscribe to one lane each (celery worker -Q fast / -Q bulk)
+FAST_QUEUE = "fast"
+BULK_QUEUE = "bulk"
+
+# Redis serves priority 0 first
+URGENT_PRIORITY = 0
+LOWEST_PRIORITY = 9
+
+def queue_keys(queue: str) -> List[str]:
+    # Redis lists of a queue, one per priority, named like the broker transport options say
+    return [queue] + [f"{queue}:{priority}" for priority in range(URGENT_PRIORITY + 1, LOWEST_PRIORITY + 1)]
+
+def job_queue(page_count: Optional[int]) -> str:
+    # Unreadable PDFs (no page count) fail right away, so they take the fast lane
+    if page_count is None or page_count <= settings.FAST_QUEUE_MAX_PAGES:
+        return FAST_QUEUE
+
+    return BULK_QUEUE
+
+def is_deadline_due(deadline_at: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    if deadline_at is None:
+        return False
+
+    now = now or datetime.now(timezone.utc)
+
+    return deadline_at - now <= timedelta(seconds=settings.DEADLINE_PROMOTION_SECONDS)
+
+def job_priority(page_count: Optional[int], deadline_at: Optional[datetime]) -> int:
+    if is_deadline_due(deadline_at):
+        return URGENT_PRIORITY
+
+    if page_count is None:
+        return 1
+
+    # Shorter documents first: 1 page -> 1, 2-3 pages -> 2, 4-7 pages -> 3, ...
+    return min(LOWEST_PRIORITY, max(1, page_count.bit_length()))
+
+def job_route(page_count: Optional[int], deadline_at: Optional[datetime]) -> Dict[str, Any]:
+    # Job columns of a (re-)enqueued job. A new task ID invalidates earlier messages.
+    return {
+        "queue": job_queue(page_count),
+        "priority": job_priority(page_count, deadline_at),
+        "task_id": str(uuid4()),
+    }
+
+def promoted_route() -> Dict[str, Any]:
+    # Front of the fast lane, its workers free up the soonest
+    return {
+        "queue": FAST_QUEUE,
+        "priority": URGENT_PRIORITY,
+        "task_id": str(uuid4()),
+    }
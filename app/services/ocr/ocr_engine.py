@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+import numpy as np
+
+class OcrEngine(ABC):
+    """
+    Runs OCR on a single image and returns word level results in the same
+    shape as `pytesseract.image_to_data(..., output_type=Output.DICT)`:
+    parallel lists under "text", "conf", "left", "top", "width" and "height".
+    """
+
+    @abstractmethod
+    def image_to_data(self, image: np.ndarray, lang: str, config: str) -> Dict[str, List[Any]]:
+        pass
+
+    def close(self) -> None:
+        pass
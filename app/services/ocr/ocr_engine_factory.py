@@ -0,0 +1,44 @@
+import os
+from typing import Optional
+
+from app.config.orc_config import OCR
+from app.services.ocr.ocr_engine import OcrEngine
+from app.services.ocr.pytesseract_engine import PytesseractEngine
+
+class OcrEngineFactory:
+    _engine: Optional[OcrEngine] = None
+    _engine_pid: Optional[int] = None
+
+    @classmethod
+    def get_engine(cls) -> OcrEngine:
+        # Tesseract handles must not be shared with forked children,
+        # so every process creates its own engine on first use
+        if cls._engine is None or cls._engine_pid != os.getpid():
+            cls._engine = cls._create_engine(OCR["engine"])
+            cls._engine_pid = os.getpid()
+
+        return cls._engine
+
+    @classmethod
+    def close_engine(cls) -> None:
+        if cls._engine is not None and cls._engine_pid == os.getpid():
+            cls._engine.close()
+
+        cls._engine = None
+        cls._engine_pid = None
+
+    @staticmethod
+    def _create_engine(engine: str) -> OcrEngine:
+        if engine == "pytesseract":
+            return PytesseractEngine()
+
+        if engine != "tesserocr":
+            raise ValueError(f"Unsupported OCR engine: {engine}")
+
+        try:
+            from app.services.ocr.tesserocr_engine import TesserocrEngine
+        except ImportError as e:
+            print(f"tesserocr is not available ({e}), falling back to pytesseract")
+            return PytesseractEngine()
+
+        return TesserocrEngine()
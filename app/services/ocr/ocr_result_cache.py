@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.config.orc_config import OCR, OCR_CACHE
+from app.database.redis_client import get_redis
+
+class OcrResultCache:
+    """
+    Caches the OCR result of a field ROI keyed by its binarized pixels and the
+    OCR settings. A bounded in-process LRU is consulted first, then (optionally)
+    the shared Redis tier.
+    """
+
+    def __init__(self, max_entries: int, redis_enabled: bool, redis_ttl_seconds: int):
+        self.max_entries = max_entries
+        self.redis_enabled = redis_enabled
+        self.redis_ttl_seconds = redis_ttl_seconds
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def key(self, field_roi: np.ndarray, tesseract_config: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(str(field_roi.shape).encode())
+        digest.update(np.ascontiguousarray(field_roi).tobytes())
+        digest.update(
+            json.dumps([
+                tesseract_config,
+                OCR["languages"],
+                OCR["engine"],
+                OCR["batch_mode"],
+            ]).encode()
+        )
+
+        return f"ocr:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return dict(self._entries[key])
+
+        if self.redis_enabled:
+            try:
+                value = get_redis().get(key)
+            except Exception as e:
+                print(f"OCR cache: Redis lookup failed: {e}")
+                value = None
+
+            if value is not None:
+                result = json.loads(value)
+                self._remember(key, result)
+                self._stats["redis_hits"] += 1
+                return dict(result)
+
+        self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        # Only successful OCR results are cached, never errors
+        if "error" in result:
+            return
+
+        self._remember(key, result)
+
+        if self.redis_enabled:
+            try:
+                get_redis().set(key, json.dumps(result), ex=self.redis_ttl_seconds)
+            except Exception as e:
+                print(f"OCR cache: Redis write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._entries[key] = dict(result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class OcrResultCacheFactory:
+    _cache: Optional[OcrResultCache] = None
+    _cache_pid: Optional[int] = None
+
+    @classmethod
+    def get_cache(cls) -> Optional[OcrResultCache]:
+        if not OCR_CACHE["enabled"]:
+            return None
+
+        if cls._cache is None or cls._cache_pid != os.getpid():
+            cls._cache = OcrResultCache(
+                max_entries=OCR_CACHE["max_entries"],
+                redis_enabled=OCR_CACHE["redis_enabled"],
+                redis_ttl_seconds=OCR_CACHE["redis_ttl_seconds"],
+            )
+            cls._cache_pid = os.getpid()
+
+        return cls._cache
@@ -0,0 +1,20 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pytesseract
+from pytesseract import Output
+
+from app.services.ocr.ocr_engine import OcrEngine
+
+class PytesseractEngine(OcrEngine):
+    """
+    Fallback engine: spawns one `tesseract` process per call.
+    """
+
+    def image_to_data(self, image: np.ndarray, lang: str, config: str) -> Dict[str, List[Any]]:
+        return pytesseract.image_to_data(
+            image,
+            lang=lang,
+            config=config,
+            output_type=Output.DICT,
+        )
@@ -0,0 +1,111 @@
+import shlex
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import tesserocr
+from tesserocr import OEM, PSM, RIL, PyTessBaseAPI
+
+from app.services.ocr.ocr_engine import OcrEngine
+
+class TesserocrEngine(OcrEngine):
+    """
+    Keeps one initialized Tesseract API handle per (language, config) pair for
+    the lifetime of the process, so the traineddata is loaded only once and
+    images are handed over in memory instead of through temp files.
+    """
+
+    def __init__(self):
+        self._apis: Dict[Tuple[str, str], PyTessBaseAPI] = {}
+        self._lock = threading.Lock()
+
+    def image_to_data(self, image: np.ndarray, lang: str, config: str) -> Dict[str, List[Any]]:
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+
+        with self._lock:
+            api = self._get_api(lang, config)
+
+            api.SetImageBytes(
+                image.tobytes(),
+                width,
+                height,
+                bytes_per_pixel,
+                width * bytes_per_pixel,
+            )
+
+            try:
+                api.Recognize()
+                iterator = api.GetIterator()
+
+                if iterator is None:
+                    return data
+
+                for word in tesserocr.iterate_level(iterator, RIL.WORD):
+                    box = word.BoundingBox(RIL.WORD)
+
+                    if box is None:
+                        continue
+
+                    x1, y1, x2, y2 = box
+                    data["text"].append(word.GetUTF8Text(RIL.WORD) or "")
+                    data["conf"].append(word.Confidence(RIL.WORD))
+                    data["left"].append(x1)
+                    data["top"].append(y1)
+                    data["width"].append(x2 - x1)
+                    data["height"].append(y2 - y1)
+            finally:
+                api.Clear()
+
+        return data
+
+    def close(self) -> None:
+        with self._lock:
+            for api in self._apis.values():
+                api.End()
+            self._apis.clear()
+
+    def _get_api(self, lang: str, config: str) -> PyTessBaseAPI:
+        key = (lang, config)
+
+        if key not in self._apis:
+            psm, oem, variables = self._parse_config(config)
+
+            api = PyTessBaseAPI(lang=lang, psm=psm, init=False)
+            api.InitFull(lang=lang, oem=oem, variables=variables)
+            api.SetPageSegMode(psm)
+
+            self._apis[key] = api
+
+        return self._apis[key]
+
+    @staticmethod
+    def _parse_config(config: str) -> Tuple[int, int, Dict[str, str]]:
+        # Translates the tesseract CLI flags used in FIELDS[*]["tesseract_config"]
+        psm = PSM.AUTO # Same default as the tesseract CLI
+        oem = OEM.DEFAULT
+        variables = {}
+
+        tokens = shlex.split(config)
+        i = 0
+
+        while i < len(tokens):
+            token = tokens[i]
+
+            if token == "--psm" and i + 1 < len(tokens):
+                psm = int(tokens[i + 1])
+                i += 2
+            elif token == "--oem" and i + 1 < len(tokens):
+                oem = int(tokens[i + 1])
+                i += 2
+            elif token == "-c" and i + 1 < len(tokens):
+                name, _, value = tokens[i + 1].partition("=")
+                variables[name] = value
+                i += 2
+            else:
+                i += 1
+
+        return psm, oem, variables
@@ -1,11 +1,17 @@
+import multiprocessing
+import queue
+import re
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
 import cv2
 import numpy as np
-import pytesseract
-from pytesseract import Output
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 from app.config.orc_config import (
     DPI,
@@ -14,58 +20,524 @@ from app.config.orc_config import (
     FIELDS,
     OCR,
     ADAPTIVE_THRESHOLD,
+    PAGE_PROCESSING,
+    PREPROCESSING,
+    RENDERING,
 )
 from app.dto import ExtractionResult, OrderPosition, FieldValue
-from app.utils.orc_should_continue_processing import should_continue_processing
+from app.services.ocr.ocr_engine_factory import OcrEngineFactory
+from app.services.ocr.ocr_result_cache import OcrResultCacheFactory
+from app.services.prometheus_metrics import OCR_CALLS_PER_PAGE, OCR_SECONDS
+from app.services.stage_metrics import StageMetrics
+from app.utils.orc_field_ink_map import compute_field_ink_map
+from app.utils.pdf_page_sizes import pdf_page_sizes
+from app.utils.render_pdf_pages_gray import render_pdf_pages_gray
+
+# Extraction service of the current process when it runs as a page worker
+_page_worker_service = None
+
+def _init_page_worker() -> None:
+    global _page_worker_service
+
+    _page_worker_service = OrderPositionExtractionService(max_workers=1)
+
+    try:
+        _page_worker_service.warm_up()
+    except Exception as e:
+        print(f"Warming up the OCR engine of page worker failed: {e}")
+
+def _process_shared_page(
+    shm_name: str, shape: Tuple[int, ...], dtype: str, page_index: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, int], Optional[Dict[str, Any]]]:
+    global _page_worker_service
+
+    if _page_worker_service is None:
+        _page_worker_service = OrderPositionExtractionService(max_workers=1)
+
+    # Attach to the page buffer the parent process rendered into shared memory
+    shm = SharedMemory(name=shm_name)
+    page_image = None
+
+    try:
+        page_image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        return _page_worker_service._process_page_with_stats(page_image, page_index)
+    finally:
+        # The view has to be released before the buffer can be closed
+        page_image = None
+        shm.close()
 
 class OrderPositionExtractionService:
-    def __init__(self):
-        self.row_count = 1
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = (
+            max_workers
+            if max_workers is not None
+            else PAGE_PROCESSING["max_workers"]
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warned_daemonic = False
+
+        # OCR cache hits and misses of the last processed PDF
+        self.ocr_cache_stats: Counter = Counter()
+
+        # Stage metrics of the last processed PDF, and of the page being processed
+        self.stage_metrics = StageMetrics()
+        self._page_metrics = StageMetrics()
+        self._page_ocr_calls = 0
 
     def extract_from_pdf(self, pdf_path: str) -> ExtractionResult:
-        self.row_count = 1 # Reset row count for each new PDF
+        page_count = self.count_pages(pdf_path)
+        all_positions = []
+
+        for _, positions in self.iter_page_positions(pdf_path, page_count):
+            all_positions.extend(positions)
 
+        return ExtractionResult(
+            positions=all_positions,
+            total_pages=page_count,
+        )
+
+    def count_pages(self, pdf_path: str) -> int:
         pdf_path = Path(pdf_path)
 
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-        pages = convert_from_path(str(pdf_path), dpi=DPI, fmt="png")
+        return pdfinfo_from_path(str(pdf_path))["Pages"]
+
+    def iter_page_positions(
+        self,
+        pdf_path: str,
+        page_count: int,
+        first_page_index: int = 0,
+        first_position_number: int = 1,
+    ) -> Iterator[Tuple[int, List[OrderPosition]]]:
+        """
+        Yields (page index, positions) for every page from first_page_index on,
+        as soon as the page and all pages before it are processed.
+        """
+        self.ocr_cache_stats = Counter()
+        self.stage_metrics = StageMetrics()
+
+        pages = self._iter_pages(Path(pdf_path), page_count, first_page_index)
+
+        if self.max_workers > 1 and page_count - first_page_index > 1 and self.can_use_page_workers():
+            page_rows = self._process_pages_parallel(pages, first_page_index)
+        else:
+            page_rows = self._process_pages_sequential(pages)
+
+        # Position numbers are assigned in page order, so they do not
+        # depend on the order in which the pages finished
+        position_number = first_position_number
+
+        for page_index, rows in page_rows:
+            positions = []
+
+            for row in rows:
+                positions.append(self._map_to_order_position(row, position_number))
+                position_number += 1
+
+            yield page_index, positions
+
+    def warm_up(self) -> None:
+        # Loads the OCR engine and its language data for the config of every field,
+        # so the first document of a process does not pay for it. Calls the engine
+        # directly, so the warm-up is not recorded as OCR latency.
+        blank_roi = np.full((FIELDS[0]["height"], FIELDS[0]["width"]), 255, dtype=np.uint8)
+
+        for field in FIELDS:
+            OcrEngineFactory.get_engine().image_to_data(
+                blank_roi,
+                lang=OCR["languages"],
+                config=self._strip_config(field) if OCR["batch_mode"] == "column" else field["tesseract_config"],
+            )
+
+    def can_use_page_workers(self) -> bool:
+        # Daemonic processes, like the children of a Celery prefork pool, may not start
+        # processes of their own. Pages are processed sequentially there.
+        if not multiprocessing.current_process().daemon:
+            return True
+
+        if not self._warned_daemonic:
+            print(
+                f"Page workers are not available in a daemonic process, processing pages sequentially "
+                f"instead of with max_workers={self.max_workers}"
+            )
+            self._warned_daemonic = True
+
+        return False
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _iter_pages(
+        self, pdf_path: Path, page_count: int, first_page_index: int = 0
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        lookahead = RENDERING["lookahead"]
+
+        if lookahead <= 0:
+            yield from self._render_pages(pdf_path, page_count, first_page_index)
+            return
+
+        # Render ahead in a background thread so rasterization overlaps with OCR,
+        # but never hold more than `lookahead` rendered pages in the queue
+        rendered_pages = queue.Queue(maxsize=lookahead)
+        stop = threading.Event()
+        end_of_pages = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    rendered_pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def render():
+            try:
+                for item in self._render_pages(pdf_path, page_count, first_page_index):
+                    if not put(item):
+                        return
+                put(end_of_pages)
+            except Exception as e:
+                put(e)
+
+        renderer = threading.Thread(target=render, daemon=True)
+        renderer.start()
+
+        try:
+            while True:
+                item = rendered_pages.get()
+
+                if item is end_of_pages:
+                    break
+
+                if isinstance(item, Exception):
+                    raise item
+
+                yield item
+        finally:
+            stop.set()
+            renderer.join()
+
+    def _render_pages(
+        self, pdf_path: Path, page_count: int, first_page_index: int = 0
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        if RENDERING["mode"] == "gray" and RENDERING["coarse_dpi"]:
+            yield from self._render_table_bands(pdf_path, page_count, first_page_index)
+            return
+
+        window_size = RENDERING["window_size"]
+
+        for first_page in range(first_page_index + 1, page_count + 1, window_size):
+            last_page = min(first_page + window_size - 1, page_count)
+
+            with self.stage_metrics.stage("render", pages=last_page - first_page + 1):
+                if RENDERING["mode"] == "gray":
+                    # Grayscale pages straight from poppler, no colour conversions needed
+                    images = render_pdf_pages_gray(str(pdf_path), first_page, last_page, DPI)
+                else:
+                    images = convert_from_path(
+                        str(pdf_path),
+                        dpi=DPI,
+                        fmt="png",
+                        first_page=first_page,
+                        last_page=last_page,
+                    )
 
-        all_positions = []
+            for offset in range(len(images)):
+                page_image = np.asarray(images[offset])
+                images[offset] = None # Drop the reference as soon as the page was handed over
 
-        for page_index, page in enumerate(pages):
-            positions = self._process_page(page, page_index)
-            all_positions.extend(positions)
+                yield first_page - 1 + offset, page_image
 
-        return ExtractionResult(
-            positions=all_positions,
-            total_pages=len(pages),
+    def _render_table_bands(
+        self, pdf_path: Path, page_count: int, first_page_index: int = 0
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        # Coarse pass over the whole page, full resolution only where the table rows are
+        window_size = RENDERING["window_size"]
+        coarse_dpi = RENDERING["coarse_dpi"]
+        scale = coarse_dpi / DPI
+
+        for first_page in range(first_page_index + 1, page_count + 1, window_size):
+            last_page = min(first_page + window_size - 1, page_count)
+
+            with self.stage_metrics.stage("render", pages=last_page - first_page + 1):
+                coarse_pages = render_pdf_pages_gray(str(pdf_path), first_page, last_page, coarse_dpi)
+                page_sizes = pdf_page_sizes(str(pdf_path), first_page, last_page)
+
+            for offset in range(len(coarse_pages)):
+                page_index = first_page - 1 + offset
+                page_number = first_page + offset
+                coarse_page = coarse_pages[offset]
+                coarse_pages[offset] = None
+
+                # The size of the page at DPI is taken from its page box, not scaled up from
+                # the coarse page. Pages whose coarse render does not match their page box
+                # are rendered completely, the rows would not be where the layout expects them.
+                page_h, page_w = self._pixel_size(page_sizes[offset], DPI)
+
+                if coarse_page.shape[:2] != self._pixel_size(page_sizes[offset], coarse_dpi):
+                    with self.stage_metrics.stage("render"):
+                        page_image = render_pdf_pages_gray(str(pdf_path), page_number, page_number, DPI)[0]
+
+                    yield page_index, page_image
+                    continue
+
+                with self.stage_metrics.stage("layout", pages=1):
+                    band_y0, band_y1 = self._table_band(coarse_page, page_index, page_h, scale)
+
+                del coarse_page
+
+                if band_y1 <= band_y0:
+                    # Not a single row to read, nothing is rendered at full resolution
+                    yield page_index, np.full((page_h, page_w), 255, dtype=np.uint8)
+                    continue
+
+                with self.stage_metrics.stage("render"):
+                    band = render_pdf_pages_gray(
+                        str(pdf_path),
+                        page_number,
+                        page_number,
+                        DPI,
+                        crop=(0, band_y0, page_w, band_y1 - band_y0),
+                    )[0]
+
+                # Same size and coordinates as the page rendered completely, the layout applies unchanged
+                page_image = np.full((page_h, page_w), 255, dtype=np.uint8)
+                page_image[band_y0:band_y1] = band
+                del band
+
+                yield page_index, page_image
+
+    def _pixel_size(self, size: Tuple[float, float], dpi: int) -> Tuple[int, int]:
+        # (height, width) in pixels of a page of `size` points rendered by pdftoppm at `dpi`
+        width, height = size
+        return int(height * dpi / 72 + 0.5), int(width * dpi / 72 + 0.5)
+
+    def _table_band(
+        self, coarse_page: np.ndarray, page_index: int, page_h: int, scale: float
+    ) -> Tuple[int, int]:
+        # Returns the y-range [y0, y1) of the table rows on the page at DPI (page_h pixels
+        # high), found on the page rendered at scale * DPI
+        start_y = (
+            LAYOUT["start_y_first_page"]
+            if page_index == 0
+            else LAYOUT["start_y_other_pages"]
+        )
+
+        row_ys = np.array(self._candidate_row_ys(start_y, page_h), dtype=np.intp)
+        coarse_row_ys = np.round(row_ys * scale).astype(np.intp)
+
+        has_ink, has_area = compute_field_ink_map(
+            self._binarize(self._to_gray(coarse_page), scale),
+            coarse_row_ys,
+            scale,
+        )
+
+        row_count = min(
+            self._table_row_count(has_ink, has_area) + RENDERING["coarse_margin_rows"],
+            len(row_ys),
         )
 
-    def _process_page(self, page, page_index: int) -> List[OrderPosition]:
-        img = np.array(page)
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-        binary = self._preprocess_image(img)
+        if row_count == 0:
+            return 0, 0
+
+        # The field ROIs of the rows, with the neighbourhood their binarization reads
+        padding = self._binarize_padding()
+        y0 = row_ys[0] + min(field["y_row_offset"] for field in FIELDS) - padding
+        y1 = row_ys[row_count - 1] + max(field["y_row_offset"] + field["height"] for field in FIELDS) + padding
+
+        return max(int(y0), 0), min(int(y1), page_h)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_page_worker,
+            )
+
+        return self._executor
+
+    def _process_pages_sequential(
+        self, pages: Iterator[Tuple[int, np.ndarray]]
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        for page_index, page_image in pages:
+            yield page_index, self._collect_page_stats(
+                *self._process_page_with_stats(page_image, page_index)
+            )
+
+    def _process_pages_parallel(
+        self, pages: Iterator[Tuple[int, np.ndarray]], first_page_index: int
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        executor = self._get_executor()
+        in_flight: Dict[Future, Tuple[int, SharedMemory]] = {}
+
+        # Finished pages that wait for an earlier page before they can be yielded
+        page_rows: Dict[int, List[Dict[str, Any]]] = {}
+        next_page_index = first_page_index
+
+        def collect(done) -> None:
+            for future in done:
+                page_index, shm = in_flight.pop(future)
+                shm.close()
+                shm.unlink()
+                page_rows[page_index] = self._collect_page_stats(*future.result())
+
+        def ready_pages() -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+            nonlocal next_page_index
+
+            while next_page_index in page_rows:
+                yield next_page_index, page_rows.pop(next_page_index)
+                next_page_index += 1
+
+        try:
+            for page_index, page_image in pages:
+                # Bound the number of pages held in shared memory at once
+                if len(in_flight) >= self.max_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    yield from ready_pages()
+
+                # Copy the page into shared memory so only its name travels to the worker
+                shm = SharedMemory(create=True, size=page_image.nbytes)
+
+                shared_image = np.ndarray(page_image.shape, dtype=page_image.dtype, buffer=shm.buf)
+                shared_image[:] = page_image
+                del shared_image
 
+                try:
+                    future = executor.submit(
+                        _process_shared_page,
+                        shm.name,
+                        page_image.shape,
+                        page_image.dtype.str,
+                        page_index,
+                    )
+                except BaseException:
+                    # Not in flight yet, so the cleanup below would not release it
+                    shm.close()
+                    shm.unlink()
+                    raise
+
+                in_flight[future] = (page_index, shm)
+                del page_image
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+                yield from ready_pages()
+        except BrokenProcessPool:
+            # A page worker died, the next document starts a new pool
+            self.close()
+            raise
+        finally:
+            for future, (_, shm) in in_flight.items():
+                future.cancel()
+                shm.close()
+                shm.unlink()
+
+    def _process_page_with_stats(
+        self, page_image: np.ndarray, page_index: int
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int], Optional[Dict[str, Any]]]:
+        # Stats are returned alongside the rows, so pages processed in
+        # worker processes are counted as well
+        cache = OcrResultCacheFactory.get_cache()
+        stats_before = Counter(cache.stats()) if cache else Counter()
+        self._page_metrics = StageMetrics()
+        self._page_ocr_calls = 0
+
+        rows = self._process_page(page_image, page_index)
+
+        OCR_CALLS_PER_PAGE.observe(self._page_ocr_calls)
+
+        stats_after = Counter(cache.stats()) if cache else Counter()
+        stats_after.subtract(stats_before)
+
+        return rows, dict(stats_after), self._page_metrics.to_dict()
+
+    def _collect_page_stats(
+        self,
+        rows: List[Dict[str, Any]],
+        ocr_cache_stats: Dict[str, int],
+        stage_metrics: Optional[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        self.ocr_cache_stats.update(ocr_cache_stats)
+        self.stage_metrics.merge(stage_metrics)
+        return rows
+
+    def _process_page(self, page_image: np.ndarray, page_index: int) -> List[Dict[str, Any]]:
         start_y = (
             LAYOUT["start_y_first_page"]
             if page_index == 0
             else LAYOUT["start_y_other_pages"]
         )
 
-        page_h, page_w = binary.shape
+        with self._page_metrics.stage("preprocess", pages=1):
+            if PREPROCESSING["mode"] == "roi":
+                binary = self._preprocess_field_rois(page_image, start_y)
+            else:
+                binary = self._preprocess_image(page_image)
 
-        rows = self._extract_rows(binary, start_y, page_h, page_index)
+        page_h, page_w = binary.shape
 
-        return [self._map_to_order_position(row) for row in rows]
+        return self._extract_rows(binary, start_y, page_h, page_index)
 
     def _preprocess_image(self, img: np.ndarray) -> np.ndarray:
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return self._binarize(self._to_gray(img))
+
+    def _preprocess_field_rois(self, img: np.ndarray, start_y: int) -> np.ndarray:
+        # Only the field ROIs of the candidate rows are ever read, so only those are
+        # binarized. Everything else on the page is left white.
+        gray = self._to_gray(img)
+        page_h, page_w = gray.shape
+        binary = np.full((page_h, page_w), 255, dtype=np.uint8)
+
+        padding = self._binarize_padding()
+
+        for y in self._candidate_row_ys(start_y, page_h):
+            for field in FIELDS:
+                x0 = LAYOUT["row_x_start"] + field["x_row_offset"]
+                y0 = y + field["y_row_offset"]
+                x1 = min(x0 + field["width"], page_w)
+                y1 = min(y0 + field["height"], page_h)
+
+                if x0 >= x1 or y0 >= y1:
+                    continue
+
+                padded_x0 = max(x0 - padding, 0)
+                padded_y0 = max(y0 - padding, 0)
+                padded_x1 = min(x1 + padding, page_w)
+                padded_y1 = min(y1 + padding, page_h)
+
+                region = self._binarize(gray[padded_y0:padded_y1, padded_x0:padded_x1])
+
+                binary[y0:y1, x0:x1] = region[
+                    y0 - padded_y0 : y1 - padded_y0,
+                    x0 - padded_x0 : x1 - padded_x0,
+                ]
+
+        return binary
+
+    def _binarize_padding(self) -> int:
+        # Pixels further than this from the crop border see the same neighbourhood
+        # through blur and threshold as they do on the full page, so their result is identical
+        return ADAPTIVE_THRESHOLD["block_size"] // 2 + max(GAUSSIAN_BLUR_KERNEL) // 2
+
+    def _to_gray(self, img: np.ndarray) -> np.ndarray:
+        # Pages rendered in "gray" mode already are grayscale
+        return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+    def _binarize(self, gray: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        # `scale` is the resolution of the page relative to DPI. Kernel sizes
+        # shrink with it and have to stay odd.
+        blur_kernel = tuple(max(1, round(size * scale)) | 1 for size in GAUSSIAN_BLUR_KERNEL)
+        block_size = max(3, round(ADAPTIVE_THRESHOLD["block_size"] * scale) | 1)
 
         # Apply Gaussian blur to reduce noise
-        gray = cv2.GaussianBlur(gray, GAUSSIAN_BLUR_KERNEL, 0)
+        gray = cv2.GaussianBlur(gray, blur_kernel, 0)
 
         # Apply adaptive thresholding to get binary image
         return cv2.adaptiveThreshold(
@@ -73,83 +545,111 @@ class OrderPositionExtractionService:
             255,
             cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv2.THRESH_BINARY,
-            ADAPTIVE_THRESHOLD["block_size"],
+            block_size,
             ADAPTIVE_THRESHOLD["constant"],
         )
 
+    def _candidate_row_ys(self, start_y: int, page_h: int) -> range:
+        # Top edge of every row that fits on the page, the table may end earlier
+        return range(start_y, page_h - LAYOUT["row_height"], LAYOUT["row_height"])
+
     def _extract_rows(
         self, binary: np.ndarray, start_y: int, page_h: int, page_index: int
     ) -> List[Dict[str, Any]]:
+        # Row detection is where empty fields are skipped
+        with self._page_metrics.stage("detect_rows", pages=1):
+            detected_rows = self._detect_rows(binary, start_y, page_h, page_index)
+
+        with self._page_metrics.stage("ocr", pages=1):
+            if OCR["batch_mode"] == "column":
+                self._ocr_rows_by_column(binary, detected_rows, page_index)
+            else:
+                self._ocr_rows_by_cell(binary, detected_rows, page_index)
+
+        return [row_data for row_data, _ in detected_rows]
+
+    def _detect_rows(
+        self, binary: np.ndarray, start_y: int, page_h: int, page_index: int
+    ) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        # Returns every table row of the page together with the fields that contain
+        # enough ink to be OCR'd. Empty fields are already filled in.
+        row_ys = np.array(self._candidate_row_ys(start_y, page_h), dtype=np.intp)
+        has_ink, has_area = compute_field_ink_map(binary, row_ys)
+        row_count = self._table_row_count(has_ink, has_area)
+
         rows = []
-        y = start_y
 
-        while y + LAYOUT["row_height"] < page_h:
+        for row_index in range(row_count):
             row_data = {
-                "y": y,
+                "y": int(row_ys[row_index]),
                 "page": page_index + 1,
                 "fields": {},
-                "row_number": self.row_count,
             }
 
-            empty_field_count = 0
-
-            # Process each field in the row
-            for field in FIELDS:
-                # Calculate absolute coordinates
-                abs_x = LAYOUT["row_x_start"] + field["x_row_offset"]
-                abs_y = y + field["y_row_offset"]
-
-                # Extract field ROI from the binary image
-                field_roi = binary[
-                    abs_y : abs_y + field["height"],
-                    abs_x : abs_x + field["width"],
-                ]
+            pending_fields = []
 
-                if field_roi.size == 0:
+            for field_index, field in enumerate(FIELDS):
+                if not has_area[row_index, field_index]:
                     continue
 
-                # Check if field should be processed
-                if not should_continue_processing(field_roi):
-                    empty_field_count += 1
+                if has_ink[row_index, field_index]:
+                    pending_fields.append(field)
+                else:
                     row_data["fields"][field["name"]] = {
                         "text": "",
                         "confidence": 0.0,
                     }
-                    continue
-
-                # Run OCR on the field
-                try:
-                    data = pytesseract.image_to_data(
-                        field_roi,
-                        lang=OCR["languages"],
-                        config=field["tesseract_config"],
-                        output_type=Output.DICT,
-                    )
 
-                    # Extract text and calculate confidence
-                    texts = []
-                    confidences = []
+            rows.append((row_data, pending_fields))
 
-                    for i, conf in enumerate(data["conf"]):
-                        if conf != -1:  # -1 means no detection
-                            txt = data["text"][i].strip()
-                            if txt:
-                                texts.append(txt)
-                                confidences.append(float(conf))
+        return rows
 
-                    text = " ".join(texts)
-                    avg_confidence = (
-                        sum(confidences) / len(confidences) if confidences else 0.0
-                    )
+    def _table_row_count(self, has_ink: np.ndarray, has_area: np.ndarray) -> int:
+        # If most of the fields are empty, we can assume the table has ended
+        # (why most and not all? Because it's a scan and someone could have written something by hand)
+        empty_field_counts = np.sum(has_area & ~has_ink, axis=1)
+        table_end = np.flatnonzero(empty_field_counts >= len(FIELDS) - 1)
+
+        return int(table_end[0]) if table_end.size else len(has_ink)
+
+    def _field_roi(self, binary: np.ndarray, y: int, field: Dict[str, Any]) -> np.ndarray:
+        # Calculate absolute coordinates
+        abs_x = LAYOUT["row_x_start"] + field["x_row_offset"]
+        abs_y = y + field["y_row_offset"]
+
+        # Extract field ROI from the binary image
+        return binary[
+            abs_y : abs_y + field["height"],
+            abs_x : abs_x + field["width"],
+        ]
+
+    def _ocr_rows_by_cell(
+        self,
+        binary: np.ndarray,
+        detected_rows: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+        page_index: int,
+    ) -> None:
+        for row_data, pending_fields in detected_rows:
+            for field in pending_fields:
+                field_roi = self._field_roi(binary, row_data["y"], field)
+
+                cache = OcrResultCacheFactory.get_cache()
+                cache_key = cache.key(field_roi, field["tesseract_config"]) if cache else None
+                cached_result = cache.get(cache_key) if cache else None
+
+                if cached_result is not None:
+                    row_data["fields"][field["name"]] = cached_result
+                    continue
 
-                    row_data["fields"][field["name"]] = {
-                        "text": text,
-                        "confidence": round(avg_confidence, 2),
-                    }
+                # Run OCR on the field
+                try:
+                    row_data["fields"][field["name"]] = self._ocr_field(field_roi, field)
 
+                    if cache:
+                        cache.set(cache_key, row_data["fields"][field["name"]])
                 except Exception as e:
                     print(
-                        f"Error processing field '{field['name']}' on page {page_index + 1}, row {self.row_count}: {e}"
+                        f"Error processing field '{field['name']}' on page {page_index + 1}, row at y={row_data['y']}: {e}"
                     )
                     row_data["fields"][field["name"]] = {
                         "text": "",
@@ -157,23 +657,143 @@ class OrderPositionExtractionService:
                         "error": str(e),
                     }
 
-            # If most of the fields are empty, we can assume the table has ended
-            # (why most and not all? Because it's a scan and someone could have written something by hand)
-            if empty_field_count >= len(FIELDS) - 1:
-                break
+    def _ocr_rows_by_column(
+        self,
+        binary: np.ndarray,
+        detected_rows: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+        page_index: int,
+    ) -> None:
+        # One OCR call per field and page: all non-empty ROIs of a field share
+        # width, whitelist and PSM, so they are stacked into a single strip
+        cache = OcrResultCacheFactory.get_cache()
+
+        for field in FIELDS:
+            cells = []
+
+            for row_data, pending_fields in detected_rows:
+                if field not in pending_fields:
+                    continue
+
+                field_roi = self._field_roi(binary, row_data["y"], field)
+                cache_key = cache.key(field_roi, field["tesseract_config"]) if cache else None
+                cached_result = cache.get(cache_key) if cache else None
+
+                # Only cache misses go into the strip
+                if cached_result is not None:
+                    row_data["fields"][field["name"]] = cached_result
+                else:
+                    cells.append((row_data, field_roi, cache_key))
+
+            if not cells:
+                continue
+
+            try:
+                results = self._ocr_field_strip([roi for _, roi, _ in cells], field)
+            except Exception as e:
+                print(
+                    f"Error processing field '{field['name']}' strip on page {page_index + 1}: {e}"
+                )
+                results = [
+                    {"text": "", "confidence": 0.0, "error": str(e)}
+                    for _ in cells
+                ]
 
-            rows.append(row_data)
+            for (row_data, _, cache_key), result in zip(cells, results):
+                row_data["fields"][field["name"]] = result
 
-            y += LAYOUT["row_height"]
-            self.row_count += 1
+                if cache:
+                    cache.set(cache_key, result)
 
-        return rows
+    def _ocr_field(self, field_roi: np.ndarray, field: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._image_to_data(field_roi, field, field["tesseract_config"])
+
+        return self._summarize_words(range(len(data["conf"])), data)
+
+    def _ocr_field_strip(
+        self, field_rois: List[np.ndarray], field: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        separator = OCR["strip_separator_height"]
+        strip_width = max(roi.shape[1] for roi in field_rois)
+
+        # Stack the ROIs with white separator bands and remember where each one starts
+        segments = []
+        parts = []
+        y = separator
+
+        parts.append(np.full((separator, strip_width), 255, dtype=np.uint8))
+
+        for roi in field_rois:
+            h, w = roi.shape[:2]
+            cell = np.full((h, strip_width), 255, dtype=np.uint8)
+            cell[:, :w] = roi
+            parts.append(cell)
+            parts.append(np.full((separator, strip_width), 255, dtype=np.uint8))
+
+            segments.append((y, y + h))
+            y += h + separator
+
+        strip = np.vstack(parts)
+
+        data = self._image_to_data(strip, field, self._strip_config(field))
+
+        # Map every word back to its row by the vertical center of its box
+        word_indices = [[] for _ in segments]
+
+        for i in range(len(data["conf"])):
+            center_y = data["top"][i] + data["height"][i] / 2
+
+            for segment_index, (segment_start, segment_end) in enumerate(segments):
+                if segment_start - separator / 2 <= center_y < segment_end + separator / 2:
+                    word_indices[segment_index].append(i)
+                    break
+
+        return [self._summarize_words(indices, data) for indices in word_indices]
+
+    def _strip_config(self, field: Dict[str, Any]) -> str:
+        # The per-field PSM (single word / single line) cannot read a stacked
+        # column, so the strip is read as a uniform block of text instead
+        return re.sub(r"--psm\s+\d+", f"--psm {OCR['strip_psm']}", field["tesseract_config"])
+
+    def _image_to_data(self, image: np.ndarray, field: Dict[str, Any], config: str) -> Dict[str, List[Any]]:
+        # Every Tesseract call goes through here and is counted
+        self._page_metrics.add("ocr", ocr_calls=1)
+        self._page_ocr_calls += 1
+
+        with OCR_SECONDS.labels(field=field["name"]).time():
+            return OcrEngineFactory.get_engine().image_to_data(
+                image,
+                lang=OCR["languages"],
+                config=config,
+            )
+
+    def _summarize_words(self, word_indices: Iterable[int], data: Dict[str, List[Any]]) -> Dict[str, Any]:
+        # Extract text and calculate confidence
+        texts = []
+        confidences = []
+
+        for i in word_indices:
+            conf = data["conf"][i]
+            if conf != -1:  # -1 means no detection
+                txt = data["text"][i].strip()
+                if txt:
+                    texts.append(txt)
+                    confidences.append(float(conf))
+
+        text = " ".join(texts)
+        avg_confidence = (
+            sum(confidences) / len(confidences) if confidences else 0.0
+        )
+
+        return {
+            "text": text,
+            "confidence": round(avg_confidence, 2),
+        }
 
-    def _map_to_order_position(self, row_data: Dict[str, Any]) -> OrderPosition:
+    def _map_to_order_position(self, row_data: Dict[str, Any], position_number: int) -> OrderPosition:
         fields = row_data["fields"]
 
         return OrderPosition(
-            position_number=row_data["row_number"],
+            position_number=position_number,
             article_number=FieldValue(
                 value=fields.get("article_number", {}).get("text", ""),
                 confidence=fields.get("article_number", {}).get("confidence", 0.0),
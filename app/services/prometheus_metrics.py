@@ -0,0 +1,169 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config.orc_config import FIELDS
+
+# Every process of the container (API workers, or Celery children and page workers)
+# writes its samples to this directory, the exporter of the container adds them up.
+# Has to be empty when the container starts.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+UPLOAD_SIZE_BYTES = Histogram(
+    "docint_upload_size_bytes",
+    "Size of uploaded PDFs and zip archives",
+    buckets=[2 ** exponent * 1024 for exponent in range(4, 22, 2)],
+)
+
+# Taken from the timestamps of the job
+JOB_QUEUE_SECONDS = Histogram(
+    "docint_job_queue_seconds",
+    "Time from job creation to processing start",
+    buckets=[1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600],
+)
+JOB_PROCESSING_SECONDS = Histogram(
+    "docint_job_processing_seconds",
+    "Time from processing start to job completion",
+    buckets=[1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600],
+)
+JOB_LATENCY_SECONDS = Histogram(
+    "docint_job_latency_seconds",
+    "Time from job creation to job completion",
+    buckets=[1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600],
+)
+JOB_PAGES = Histogram(
+    "docint_job_pages",
+    "Pages per completed job",
+    buckets=[1, 2, 5, 10, 20, 50, 100, 200, 500],
+)
+JOBS_FINISHED = Counter(
+    "docint_jobs_finished",
+    "Jobs that were completed or failed",
+    ["status"],
+)
+
+OCR_CALLS_PER_PAGE = Histogram(
+    "docint_ocr_calls_per_page",
+    "Tesseract calls per processed page",
+    buckets=[0, 1, 2, 4, 8, 16, 32, 64, 128],
+)
+# One series per field of FIELDS
+OCR_SECONDS = Histogram(
+    "docint_ocr_seconds",
+    "Latency of a single Tesseract call, by field",
+    ["field"],
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+
+for field in FIELDS:
+    OCR_SECONDS.labels(field=field["name"])
+
+EXPORT_SECONDS = Histogram(
+    "docint_export_seconds",
+    "Time to generate an export, until its last byte was produced",
+    ["format"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def observe_job_finished(job: Any) -> None:
+    JOBS_FINISHED.labels(status=job.status.value).inc()
+
+    if job.completed_at is None:
+        return
+
+    created_at = _as_utc(job.created_at)
+    completed_at = _as_utc(job.completed_at)
+
+    if job.started_at is not None:
+        started_at = _as_utc(job.started_at)
+        JOB_QUEUE_SECONDS.observe((started_at - created_at).total_seconds())
+        JOB_PROCESSING_SECONDS.observe((completed_at - started_at).total_seconds())
+
+    JOB_LATENCY_SECONDS.observe((completed_at - created_at).total_seconds())
+    JOB_PAGES.observe(job.pages_processed)
+
+def observe_export(format: str, export: Any, start: float) -> Any:
+    # Streamed exports are only done once their body iterator is exhausted
+    if hasattr(export, "body_iterator"):
+        export.body_iterator = _timed_body(format, export.body_iterator, start)
+    else:
+        EXPORT_SECONDS.labels(format=format).observe(time.perf_counter() - start)
+
+    return export
+
+async def _timed_body(format: str, body_iterator: AsyncIterator[Any], start: float) -> AsyncIterator[Any]:
+    async for chunk in body_iterator:
+        yield chunk
+
+    EXPORT_SECONDS.labels(format=format).observe(time.perf_counter() - start)
+
+class StateCollector:
+    """
+    Gauges read at scrape time: messages waiting per queue, and pending and running jobs.
+    """
+
+    def __init__(self, queue_depths: Dict[str, int], job_counts: Dict[str, int]):
+        self.queue_depths = queue_depths
+        self.job_counts = job_counts
+
+    def collect(self):
+        queue_depth = GaugeMetricFamily(
+            "docint_queue_depth",
+            "Messages waiting in a Celery queue",
+            labels=["queue"],
+        )
+        for queue, depth in self.queue_depths.items():
+            queue_depth.add_metric([queue], depth)
+
+        jobs = GaugeMetricFamily(
+            "docint_jobs",
+            "Pending and running jobs",
+            labels=["status"],
+        )
+        for status, count in self.job_counts.items():
+            jobs.add_metric([status], count)
+
+        yield queue_depth
+        yield jobs
+
+def metrics_registry() -> CollectorRegistry:
+    if not MULTIPROC_DIR:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, MULTIPROC_DIR)
+
+    return registry
+
+def render_metrics(state: Optional[StateCollector] = None) -> bytes:
+    registry = metrics_registry()
+    output = generate_latest(registry)
+
+    if state is not None:
+        # Own registry, so the state never ends up in the process wide one
+        state_registry = CollectorRegistry()
+        state_registry.register(state)
+        output += generate_latest(state_registry)
+
+    return output
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
@@ -0,0 +1,87 @@
+import resource
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.config.settings import settings
+
+# Kept as the largest value when metrics are merged, every other value is summed
+PEAK_KEYS = {"peak_rss_mib"}
+
+def peak_rss_mib() -> float:
+    # Peak resident memory of this process so far, ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class StageMetrics:
+    """
+    Wall time, CPU time, calls, pages and peak memory per processing stage.
+
+    CPU time is the time of the calling thread, so the pdftoppm and tesseract
+    subprocesses are not part of it. Disabled through JOB_METRICS_ENABLED,
+    then nothing is measured.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = settings.JOB_METRICS_ENABLED if enabled is None else enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, pages: int = 0) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+
+        try:
+            yield
+        finally:
+            self.add(
+                name,
+                wall_seconds=time.perf_counter() - wall_start,
+                cpu_seconds=time.thread_time() - cpu_start,
+                calls=1,
+                pages=pages,
+                peak_rss_mib=peak_rss_mib(),
+            )
+
+    def add(self, name: str, **values: float) -> None:
+        if not self.enabled:
+            return
+
+        stage = self.stages.setdefault(name, {})
+
+        for key, value in values.items():
+            if key in PEAK_KEYS:
+                stage[key] = max(stage.get(key, 0), value)
+            else:
+                stage[key] = stage.get(key, 0) + value
+
+    def merge(self, stages: Optional[Dict[str, Dict[str, float]]]) -> "StageMetrics":
+        # Adds metrics measured elsewhere, e.g. in a page worker or an earlier attempt
+        for name, values in (stages or {}).items():
+            self.add(name, **values)
+
+        return self
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        return {
+            name: {key: round(value, 4) for key, value in values.items()}
+            for name, values in self.stages.items()
+        }
+
+def merge_metrics(*stages: Optional[Dict[str, Dict[str, float]]]) -> Optional[Dict[str, Any]]:
+    # Metrics of a job, combined from its attempts, page ranges and the worker itself
+    metrics = StageMetrics()
+
+    if not metrics.enabled:
+        return stages[0] if stages else None
+
+    for values in stages:
+        metrics.merge(values)
+
+    return metrics.to_dict()
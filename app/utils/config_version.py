@@ -0,0 +1,35 @@
+import hashlib
+import json
+
+from app.config import field_config, orc_config
+
+def get_config_version() -> str:
+    # Everything that can change the extracted values of a document.
+    # Settings that only affect speed (workers, look-ahead, ROI-local
+    # preprocessing, ...) are left out on purpose.
+    config = {
+        "dpi": orc_config.DPI,
+        "rendering_mode": orc_config.RENDERING["mode"],
+        "gaussian_blur_kernel": orc_config.GAUSSIAN_BLUR_KERNEL,
+        "adaptive_threshold": orc_config.ADAPTIVE_THRESHOLD,
+        "row_processing": orc_config.ROW_PROCESSING,
+        "layout": orc_config.LAYOUT,
+        "fields": orc_config.FIELDS,
+        "ocr": orc_config.OCR,
+        "kvk_digits_after_decimal": field_config.KVK_DIGESTS_AFTER_DECIMAL,
+        "wgp_digits_after_decimal": field_config.WGP_DIGESTS_AFTER_DECIMAL,
+        "article_number_length": field_config.ARTICLE_NUMBER_LENGTH,
+        "confidence_threshold": field_config.CONFIDENCE_THRESHOLD,
+    }
+
+    # The coarse pass decides where the rendered table ends. Only added when it is
+    # enabled, so results of full page rendering keep their version.
+    if orc_config.RENDERING["mode"] == "gray" and orc_config.RENDERING["coarse_dpi"]:
+        config["coarse_rendering"] = {
+            "dpi": orc_config.RENDERING["coarse_dpi"],
+            "margin_rows": orc_config.RENDERING["coarse_margin_rows"],
+        }
+
+    serialized = json.dumps(config, sort_keys=True, default=str)
+
+    return hashlib.sha256(serialized.encode()).hexdigest()
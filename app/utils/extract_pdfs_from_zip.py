@@ -0,0 +1,67 @@
+import hashlib
+import os
+import uuid
+import zipfile
+from typing import List, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.save_upload_file import UploadTooLargeError
+
+def extract_pdfs_from_zip(
+    zip_path: str, max_pdfs: Optional[int] = None, max_total_bytes: Optional[int] = None
+) -> List[Tuple[str, str, str, int]]:
+    """
+    Unpacks every PDF of an archive into its own temporary file next to the job
+    files, member by member in chunks. Returns (name, temp path, SHA-256, size) per PDF.
+    Raises UploadTooLargeError once more than max_pdfs PDFs or max_total_bytes
+    unpacked bytes would be written. Blocking, run it in the thread pool.
+    """
+    max_pdfs = max_pdfs if max_pdfs is not None else settings.MAX_BATCH_ZIP_PDFS
+    max_total_bytes = max_total_bytes if max_total_bytes is not None else settings.MAX_BATCH_ZIP_UNCOMPRESSED_BYTES
+
+    extracted = []
+    total_bytes = 0
+
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                    continue
+
+                if member.file_size > settings.MAX_UPLOAD_SIZE_BYTES:
+                    raise UploadTooLargeError(
+                        f"{member.filename} exceeds the maximum upload size of {settings.MAX_UPLOAD_SIZE_BYTES} bytes"
+                    )
+
+                # Small archives of highly compressible members must not fill the disk
+                if len(extracted) >= max_pdfs:
+                    raise UploadTooLargeError("The zip archives of the batch contain too many PDFs")
+
+                if total_bytes + member.file_size > max_total_bytes:
+                    raise UploadTooLargeError("The PDFs of the zip archives of the batch are too large in total")
+
+                temp_path = os.path.join(settings.FILES_DIR, f"upload-{uuid.uuid4().hex}.tmp")
+                content_hash = hashlib.sha256()
+                size = 0
+                extracted.append((member.filename, temp_path, None, 0))
+
+                with archive.open(member) as source, open(temp_path, "wb") as target:
+                    while chunk := source.read(settings.UPLOAD_CHUNK_SIZE_BYTES):
+                        # The declared sizes are checked above, count what is actually written
+                        size += len(chunk)
+
+                        if total_bytes + size > max_total_bytes:
+                            raise UploadTooLargeError("The PDFs of the zip archives of the batch are too large in total")
+
+                        content_hash.update(chunk)
+                        target.write(chunk)
+
+                total_bytes += size
+                extracted[-1] = (member.filename, temp_path, content_hash.hexdigest(), size)
+    except BaseException:
+        for _, temp_path, _, _ in extracted:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+
+    return extracted
@@ -0,0 +1,36 @@
+import ipaddress
+import socket
+from urllib.parse import urlparse
+
+from app.config.settings import settings
+
+def is_valid_callback_url(url: str) -> bool:
+    # Callbacks are POSTed from inside the worker network. Unless the host is allow-listed,
+    # every address it resolves to has to be public, so a callback can never reach Redis,
+    # Postgres, cloud metadata or other internal services. Resolves the host, blocking.
+    parsed = urlparse(url)
+
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+
+    if settings.WEBHOOK_ALLOWED_HOSTS:
+        return parsed.hostname.lower() in (host.lower() for host in settings.WEBHOOK_ALLOWED_HOSTS)
+
+    try:
+        default_port = 443 if parsed.scheme == "https" else 80
+        addresses = socket.getaddrinfo(parsed.hostname, parsed.port or default_port, proto=socket.IPPROTO_TCP)
+    except (ValueError, OSError):
+        return False
+
+    for *_, sockaddr in addresses:
+        # Without the zone of link-local IPv6 addresses
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+
+        # Loopback, private, link-local, shared and reserved ranges are not global
+        if not address.is_global or address.is_multicast:
+            return False
+
+    return bool(addresses)
@@ -0,0 +1,6 @@
+import os
+
+from app.config.settings import settings
+
+def job_file_path(job_id: int) -> str:
+    return os.path.join(settings.FILES_DIR, f"{job_id}.pdf")
@@ -0,0 +1,63 @@
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from app.config.orc_config import ROW_PROCESSING
+from app.utils.scale_layout import scale_layout
+
+def has_enough_ink(white_pixels, black_pixels, total_pixels, scale: float = 1.0):
+    # Works on scalars as well as on numpy arrays of pixel counts.
+    # `scale` is the resolution relative to DPI, pixel counts shrink with its square.
+    white_ratio = white_pixels / total_pixels
+
+    # If ROI is mostly white (empty), or not enough black pixels, skip processing
+    return np.logical_and(
+        white_ratio <= ROW_PROCESSING["max_white_pixel_ratio"],
+        black_pixels >= ROW_PROCESSING["min_required_black_pixels"] * scale ** 2,
+    )
+
+def compute_field_ink_map(
+    binary: np.ndarray, row_ys: np.ndarray, scale: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decides for every field ROI of every candidate row at once whether it
+    contains enough ink to be OCR'd, using a single integral image of the page.
+    `binary` and `row_ys` are at scale * DPI, the layout is scaled to match.
+
+    Returns two (rows, fields) boolean arrays: `has_ink` and `has_area`
+    (False where the ROI lies completely outside of the page).
+    """
+    layout, fields = scale_layout(scale)
+    page_h, page_w = binary.shape
+
+    # Integral image of black pixels, 0 can be used because the scan is binary
+    black_integral = cv2.integral((binary == 0).view(np.uint8))
+
+    has_ink = np.zeros((len(row_ys), len(fields)), dtype=bool)
+    has_area = np.zeros((len(row_ys), len(fields)), dtype=bool)
+
+    for field_index, field in enumerate(fields):
+        # Same clipping as slicing the ROI out of the page
+        x0 = min(layout["row_x_start"] + field["x_row_offset"], page_w)
+        x1 = min(x0 + field["width"], page_w)
+        y0 = np.minimum(row_ys + field["y_row_offset"], page_h)
+        y1 = np.minimum(y0 + field["height"], page_h)
+
+        total_pixels = (y1 - y0) * (x1 - x0)
+        black_pixels = (
+            black_integral[y1, x1]
+            - black_integral[y0, x1]
+            - black_integral[y1, x0]
+            + black_integral[y0, x0]
+        )
+        white_pixels = total_pixels - black_pixels
+
+        has_area[:, field_index] = total_pixels > 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            has_ink[:, field_index] = has_area[:, field_index] & has_enough_ink(
+                white_pixels, black_pixels, total_pixels, scale
+            )
+
+    return has_ink, has_area
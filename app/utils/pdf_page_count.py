@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pdf2image import pdfinfo_from_path
+
+def pdf_page_count(pdf_path: str) -> Optional[int]:
+    # Read from the document structure by pdfinfo, no page is rasterized.
+    # None for files poppler cannot read, the worker reports those.
+    try:
+        return pdfinfo_from_path(pdf_path)["Pages"]
+    except Exception:
+        return None
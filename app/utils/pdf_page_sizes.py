@@ -0,0 +1,49 @@
+import re
+import subprocess
+from typing import Dict, List, Tuple
+
+PAGE_LINE = re.compile(r"^Page\s+(\d+)\s+(size|rot|MediaBox|CropBox):\s*(.*)$")
+
+def pdf_page_sizes(pdf_path: str, first_page: int, last_page: int) -> List[Tuple[float, float]]:
+    # (width, height) in points of every page as pdftoppm renders it: the MediaBox,
+    # turned by the page rotation. Read by pdfinfo, no page is rasterized.
+    process = subprocess.run(
+        ["pdfinfo", "-box", "-f", str(first_page), "-l", str(last_page), pdf_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"pdfinfo failed for pages {first_page}-{last_page} of {pdf_path}: "
+            f"{process.stderr.decode(errors='replace').strip()}"
+        )
+
+    pages: Dict[int, Dict[str, str]] = {}
+
+    for line in process.stdout.decode(errors="replace").splitlines():
+        match = PAGE_LINE.match(line)
+
+        if match:
+            pages.setdefault(int(match.group(1)), {})[match.group(2)] = match.group(3)
+
+    sizes = []
+
+    for page_number in range(first_page, last_page + 1):
+        page = pages[page_number]
+        media_box = [float(value) for value in page["MediaBox"].split()]
+        crop_box = [float(value) for value in page["CropBox"].split()]
+
+        # The boxes are printed with two decimals only, the size line (of the
+        # CropBox) with six significant digits. Rounding to pixels needs the latter.
+        if media_box == crop_box:
+            width, height = (float(value) for value in page["size"].split()[0:3:2])
+        else:
+            width, height = media_box[2] - media_box[0], media_box[3] - media_box[1]
+
+        if int(page.get("rot", "0")) % 180 == 90:
+            width, height = height, width
+
+        sizes.append((width, height))
+
+    return sizes
@@ -0,0 +1,83 @@
+import subprocess
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+def render_pdf_pages_gray(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    crop: Optional[Tuple[int, int, int, int]] = None,
+) -> List[np.ndarray]:
+    # Let poppler render 8-bit grayscale (PGM) to stdout instead of RGB images.
+    # `crop` (x, y, width, height) in pixels at `dpi` renders only that area of
+    # every page, a width or height of 0 extends the area to the page edge.
+    crop_args = []
+
+    if crop is not None:
+        x, y, width, height = crop
+        crop_args = ["-x", str(x), "-y", str(y), "-W", str(width), "-H", str(height)]
+
+    process = subprocess.run(
+        [
+            "pdftoppm",
+            "-gray",
+            "-r", str(dpi),
+            "-f", str(first_page),
+            "-l", str(last_page),
+            *crop_args,
+            pdf_path,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"pdftoppm failed for pages {first_page}-{last_page} of {pdf_path}: "
+            f"{process.stderr.decode(errors='replace').strip()}"
+        )
+
+    return parse_pgm_stream(process.stdout)
+
+def parse_pgm_stream(data: bytes) -> List[np.ndarray]:
+    # pdftoppm writes one binary PGM (P5) per page back to back.
+    # The pages are returned as read-only views into `data`, nothing is copied.
+    pages = []
+    offset = 0
+
+    while offset < len(data):
+        header = []
+
+        # Header: magic number, width, height and max gray value separated by whitespace
+        while len(header) < 4:
+            while data[offset:offset + 1].isspace():
+                offset += 1
+
+            if data[offset:offset + 1] == b"#":
+                offset = data.index(b"\n", offset) + 1
+                continue
+
+            end = offset
+            while end < len(data) and not data[end:end + 1].isspace():
+                end += 1
+
+            header.append(data[offset:end])
+            offset = end
+
+        magic, width, height, max_value = header
+
+        if magic != b"P5" or int(max_value) > 255:
+            raise ValueError(f"Unsupported PGM image: {magic!r} with max value {max_value!r}")
+
+        # Exactly one whitespace character separates the header from the pixels
+        offset += 1
+
+        width, height = int(width), int(height)
+        page = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=offset)
+        pages.append(page.reshape(height, width))
+
+        offset += width * height
+
+    return pages
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import uuid
+from typing import Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import settings
+from app.services.prometheus_metrics import UPLOAD_SIZE_BYTES
+
+class UploadTooLargeError(Exception):
+    pass
+
+async def save_upload_file(file: UploadFile, max_size: Optional[int] = None) -> Tuple[str, str]:
+    """
+    Streams an upload in chunks into a temporary file next to the job files and
+    returns its path and SHA-256. Blocking file I/O runs in the thread pool so the
+    event loop keeps serving other requests. The caller renames or removes the file.
+    """
+    max_size = max_size if max_size is not None else settings.MAX_UPLOAD_SIZE_BYTES
+
+    # Starlette spooled the part before the route ran, so its size is usually known.
+    # The request body as a whole is capped while it arrives by UploadSizeLimitMiddleware.
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_size} bytes")
+
+    temp_path = os.path.join(settings.FILES_DIR, f"upload-{uuid.uuid4().hex}.tmp")
+    content_hash = hashlib.sha256()
+    size = 0
+
+    f = await run_in_threadpool(open, temp_path, "wb")
+
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE_BYTES):
+            size += len(chunk)
+
+            if size > max_size:
+                raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_size} bytes")
+
+            content_hash.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+
+        await run_in_threadpool(f.close)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(os.remove, temp_path)
+        raise
+
+    UPLOAD_SIZE_BYTES.observe(size)
+
+    return temp_path, content_hash.hexdigest()
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List, Tuple
+
+from app.config.orc_config import FIELDS, LAYOUT
+
+# Keys of LAYOUT and FIELDS that are pixel coordinates at DPI
+LAYOUT_PIXEL_KEYS = ("start_y_first_page", "start_y_other_pages", "row_x_start", "row_height", "row_width")
+FIELD_PIXEL_KEYS = ("x_row_offset", "width", "y_row_offset", "height")
+
+def scale_layout(scale: float) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    # LAYOUT and FIELDS for a page rendered at scale * DPI
+    if scale == 1:
+        return LAYOUT, FIELDS
+
+    layout = {
+        key: round(value * scale) if key in LAYOUT_PIXEL_KEYS else value
+        for key, value in LAYOUT.items()
+    }
+    fields = [
+        {key: round(value * scale) if key in FIELD_PIXEL_KEYS else value for key, value in field.items()}
+        for field in FIELDS
+    ]
+
+    return layout, fields
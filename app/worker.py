@@ -1,89 +1,551 @@
-from datetime import datetime, timezone
+import json
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from celery import chord
+from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
+from app.config.orc_config import PAGE_PROCESSING
+from app.config.settings import settings
 from app.database.sync_session import SessionLocal
 from app.database.models.job import Job, JobStatus 
 from app.database.models.extraction_result import ExtractionResult
 from app.database.models.order_position import OrderPosition
-from app.services.orc_service import OrderPositionExtractionService
+from app.dto import OrderPosition as OrderPositionDto
+from app.services.deduplication_service import complete_duplicate_jobs
+from app.services.job_routing import FAST_QUEUE, URGENT_PRIORITY, promoted_route
+from app.services.job_events import (
+    is_job_failed,
+    mark_job_failed,
+    publish_job_event,
+    publish_page_processed,
+    reset_processed_pages,
+)
+from app.services.prometheus_metrics import observe_job_finished
+from app.services.stage_metrics import StageMetrics, merge_metrics
 from app.utils.post_processing.article_number_post_processing import post_process_article_number
 from app.utils.post_processing.description_post_processing import post_process_description
 from app.utils.post_processing.kvk_post_processing import post_process_kvk
 from app.utils.post_processing.wgp_post_processing import post_process_wgp
 from app.config.field_config import CONFIDENCE_THRESHOLD
+from app.utils.is_valid_callback_url import is_valid_callback_url
+from app.utils.job_file_path import job_file_path
+from app.worker_lifecycle import get_extraction_service
+
+def build_order_position_row(extraction_result_id: int, pos: OrderPositionDto) -> Dict[str, Any]:
+    article_number_value = post_process_article_number(pos.article_number.value)
+    article_number_confidence = pos.article_number.confidence if article_number_value else 0.0
+    if article_number_confidence < CONFIDENCE_THRESHOLD:
+        article_number_value = None
+        article_number_confidence = 0.0
+
+    description_value = post_process_description(pos.description.value)
+    description_confidence = pos.description.confidence if description_value else 0.0
+    if description_confidence < CONFIDENCE_THRESHOLD:
+        description_value = None
+        description_confidence = 0.0
+
+    kvk_value = post_process_kvk(pos.kvk.value)
+    kvk_confidence = pos.kvk.confidence if kvk_value else 0.0
+    if kvk_confidence < CONFIDENCE_THRESHOLD:
+        kvk_value = None
+        kvk_confidence = 0.0
+
+    wgp_value = post_process_wgp(pos.wgp.value)
+    wgp_confidence = pos.wgp.confidence if wgp_value else 0.0
+    if wgp_confidence < CONFIDENCE_THRESHOLD:
+        wgp_value = None
+        wgp_confidence = 0.0
+
+    return {
+        "extraction_result_id": extraction_result_id,
+        "position_number": pos.position_number,
+        "article_number_value": article_number_value,
+        "article_number_confidence": article_number_confidence,
+        "description_value": description_value,
+        "description_confidence": description_confidence,
+        "kvk_value": kvk_value,
+        "kvk_confidence": kvk_confidence,
+        "wgp_value": wgp_value,
+        "wgp_confidence": wgp_confidence,
+    }
+
+def job_status_event(job: Job) -> Dict[str, Any]:
+    # Taken before the commit, so notifying does not reload the expired jobs
+    return {
+        "job_id": job.id,
+        "batch_id": job.batch_id,
+        "status": job.status.value,
+        "error": job.error,
+        "callback_url": job.callback_url,
+    }
+
+def notify_job_finished(events: List[Dict[str, Any]]) -> None:
+    # Must only be called after the commit, subscribers read the result right away
+    for event in events:
+        publish_job_event(
+            event["job_id"],
+            event["batch_id"],
+            "status",
+            status=event["status"],
+            error=event["error"],
+        )
+
+        if event["callback_url"]:
+            send_job_callback.delay(event["job_id"])
+
+# A retry would fail the same way
+NON_RETRYABLE_ERRORS = (FileNotFoundError, PDFPageCountError, PDFSyntaxError)
+
+def finish_job(db: Session, job: Job, status: JobStatus, error: Optional[str] = None) -> None:
+    # Completes or fails the job together with the jobs coalesced onto it, then
+    # commits and notifies. The positions of a completed job must be in the session.
+    job.status = status
+    job.error = error
+
+    if status == JobStatus.completed:
+        job.completed_at = datetime.now(timezone.utc)
+
+    db.flush()
+
+    # Jobs for the same file that were uploaded while this one was running
+    finished_jobs = [job]
+    if job.content_hash:
+        finished_jobs.extend(complete_duplicate_jobs(db, job))
 
-@celery_app.task(bind=True)
+    events = [job_status_event(finished_job) for finished_job in finished_jobs]
+
+    for finished_job in finished_jobs:
+        observe_job_finished(finished_job)
+
+    db.commit()
+
+    notify_job_finished(events)
+
+def retry_countdown(retries: int) -> int:
+    return settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** retries
+
+# Late acks: a task lost with its worker is delivered again and resumes
+# after the last committed page
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=settings.JOB_MAX_RETRIES,
+)
 def process_document(self, job_id: int):
     db = SessionLocal()
+    orc_service = get_extraction_service()
 
     try:
-        job = db.query(Job).get(job_id)
+        # Locked until the claim is committed, so a promotion cannot replace the task meanwhile
+        job = db.query(Job).with_for_update().get(job_id)
+
+        # Messages replaced by a promotion, and duplicates of finished jobs, are dropped
+        if job.status in (JobStatus.completed, JobStatus.failed) or (
+            job.task_id is not None and job.task_id != self.request.id
+        ):
+            db.rollback()
+            print(f"Skipping stale task {self.request.id} of job {job_id}")
+            return False
+
+        if job.pages_processed == 0:
+            job.started_at = datetime.now(timezone.utc)
+
         job.status = JobStatus.running
-        job.started_at = datetime.now(timezone.utc)
+        job.error = None
+        batch_id = job.batch_id
+        queue, priority = job.queue, job.priority
+        first_page_index = job.pages_processed
+
+        # Metrics of earlier attempts are added to, like the positions
+        previous_metrics = job.metrics
+        worker_metrics = StageMetrics()
+
+        pdf_path = job_file_path(job.id)
+        page_count = orc_service.count_pages(pdf_path)
+
+        # The result exists from the start, so positions can be stored (and read) page by page
+        extraction_result_id = db.execute(
+            select(ExtractionResult.id).where(ExtractionResult.job_id == job.id)
+        ).scalar_one_or_none()
+
+        if extraction_result_id is None:
+            extraction_result_id = db.execute(
+                insert(ExtractionResult)
+                .values(job_id=job.id, total_pages=page_count)
+                .returning(ExtractionResult.id)
+            ).scalar_one()
+
+        first_position_number = db.execute(
+            select(func.coalesce(func.max(OrderPosition.position_number), 0))
+            .where(OrderPosition.extraction_result_id == extraction_result_id)
+        ).scalar_one() + 1
+
         db.commit()
 
-        file_path = f"/files/{job.id}.pdf"
+        publish_job_event(job_id, batch_id, "status", status=JobStatus.running.value)
 
-        orc_service = OrderPositionExtractionService()
-        result = orc_service.extract_from_pdf(file_path)
+        if first_page_index > 0:
+            print(f"Resuming job {job_id} at page {first_page_index + 1} of {page_count}")
 
-        extraction_result = ExtractionResult(
-            job_id=job.id,
-            total_pages=result.total_pages,
+        # Large documents are spread over the workers of the cluster
+        fan_out_min_pages = PAGE_PROCESSING["fan_out_min_pages"]
+        if fan_out_min_pages and page_count - first_page_index >= fan_out_min_pages:
+            fan_out_document(
+                job_id,
+                batch_id,
+                queue,
+                priority,
+                page_count,
+                first_page_index,
+                extraction_result_id,
+                first_position_number,
+            )
+
+            # The job is completed (or failed) by the chord callback
+            return False
+
+        pages = orc_service.iter_page_positions(
+            pdf_path,
+            page_count,
+            first_page_index,
+            first_position_number,
         )
 
-        db.add(extraction_result)
-        db.flush()
-
-        for pos in result.positions:
-            article_number_value = post_process_article_number(pos.article_number.value)
-            article_number_confidence = pos.article_number.confidence if article_number_value else 0.0
-            if article_number_confidence < CONFIDENCE_THRESHOLD:
-                article_number_value = None
-                article_number_confidence = 0.0
-
-            description_value = post_process_description(pos.description.value)
-            description_confidence = pos.description.confidence if description_value else 0.0
-            if description_confidence < CONFIDENCE_THRESHOLD:
-                description_value = None
-                description_confidence = 0.0
-
-            kvk_value = post_process_kvk(pos.kvk.value)
-            kvk_confidence = pos.kvk.confidence if kvk_value else 0.0
-            if kvk_confidence < CONFIDENCE_THRESHOLD:
-                kvk_value = None
-                kvk_confidence = 0.0
-
-            wgp_value = post_process_wgp(pos.wgp.value)
-            wgp_confidence = pos.wgp.confidence if wgp_value else 0.0
-            if wgp_confidence < CONFIDENCE_THRESHOLD:
-                wgp_value = None
-                wgp_confidence = 0.0
-
-            order_position = OrderPosition(
-                extraction_result_id=extraction_result.id,
-                position_number=pos.position_number,
-                article_number_value=article_number_value,
-                article_number_confidence=article_number_confidence,
-                description_value=description_value,
-                description_confidence=description_confidence,
-                kvk_value=kvk_value,
-                kvk_confidence=kvk_confidence,
-                wgp_value=wgp_value,
-                wgp_confidence=wgp_confidence,
+        for page_index, positions in pages:
+            with worker_metrics.stage("post_processing", pages=1):
+                rows = [build_order_position_row(extraction_result_id, pos) for pos in positions]
+
+            with worker_metrics.stage("db_write", pages=1):
+                # All positions of a page go out as one executemany instead of one INSERT per ORM object
+                if rows:
+                    db.execute(insert(OrderPosition), rows)
+
+                # Committed together with the positions of the page, so a retry
+                # resumes right after the last page whose positions were stored
+                db.execute(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .values(
+                        pages_processed=page_index + 1,
+                        metrics=merge_metrics(
+                            previous_metrics,
+                            orc_service.stage_metrics.to_dict(),
+                            worker_metrics.to_dict(),
+                        ),
+                    )
+                )
+                db.commit()
+
+            publish_job_event(
+                job_id,
+                batch_id,
+                "progress",
+                pages_processed=page_index + 1,
+                total_pages=page_count,
             )
-            db.add(order_position)
 
-        job.status = JobStatus.completed
-        job.completed_at = datetime.now(timezone.utc)
-        db.commit()
+        print(f"OCR cache for job {job_id}: {dict(orc_service.ocr_cache_stats)}")
+
+        # Includes the write of the last page
+        job.metrics = merge_metrics(
+            previous_metrics,
+            orc_service.stage_metrics.to_dict(),
+            worker_metrics.to_dict(),
+        )
+        finish_job(db, job, JobStatus.completed)
 
         return True
 
     except Exception as e:
-        job.status = JobStatus.failed
-        job.error = str(e)
-        db.commit()
+        db.rollback()
+
+        # Pages committed so far are kept, the retry continues after them
+        if not isinstance(e, NON_RETRYABLE_ERRORS) and self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+        finish_job(db, job, JobStatus.failed, str(e))
+        raise
+    finally:
+        db.close()
+
+def fan_out_document(
+    job_id: int,
+    batch_id: Optional[int],
+    queue: Optional[str],
+    priority: Optional[int],
+    page_count: int,
+    first_page_index: int,
+    extraction_result_id: int,
+    first_position_number: int,
+) -> None:
+    range_size = PAGE_PROCESSING["fan_out_range_size"]
+
+    reset_processed_pages(job_id, first_page_index)
+
+    # Ranges go to the lane of the job, one step ahead of documents that have not started yet
+    range_queue = queue or FAST_QUEUE
+    range_priority = max(URGENT_PRIORITY, priority - 1) if priority is not None else URGENT_PRIORITY
+
+    header = [
+        process_page_range.s(
+            job_id,
+            batch_id,
+            range_first_page_index,
+            min(range_first_page_index + range_size, page_count),
+            page_count,
+        ).set(queue=range_queue, priority=range_priority)
+        for range_first_page_index in range(first_page_index, page_count, range_size)
+    ]
+
+    callback = finalize_document.s(
+        job_id,
+        extraction_result_id,
+        page_count,
+        first_position_number,
+    ).on_error(fail_document.s(job_id))
+
+    chord(header)(callback)
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=settings.JOB_MAX_RETRIES,
+)
+def process_page_range(
+    self,
+    job_id: int,
+    batch_id: Optional[int],
+    first_page_index: int,
+    end_page_index: int,
+    page_count: int,
+) -> Dict[str, Any]:
+    # Positions of the pages [first_page_index, end_page_index), one list per page,
+    # and the stage metrics of the range. Position numbers are assigned by finalize_document.
+    # Once another range failed the job, its result is thrown away
+    if is_job_failed(job_id):
+        return {"positions": [], "metrics": None}
+
+    orc_service = get_extraction_service()
+
+    try:
+        # Only the pages of the range are rendered
+        pages = orc_service.iter_page_positions(
+            job_file_path(job_id),
+            end_page_index,
+            first_page_index,
+        )
+
+        page_positions = []
+
+        for page_index, positions in pages:
+            page_positions.append([pos.model_dump() for pos in positions])
+            publish_page_processed(job_id, batch_id, page_index, page_count)
+
+            if is_job_failed(job_id):
+                # Closing the iterator cancels the pages still in flight
+                pages.close()
+                return {"positions": [], "metrics": None}
+
+        return {
+            "positions": page_positions,
+            "metrics": orc_service.stage_metrics.to_dict(),
+        }
+
+    except Exception as e:
+        if not isinstance(e, NON_RETRYABLE_ERRORS) and self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+        raise
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=settings.JOB_MAX_RETRIES,
+)
+def finalize_document(
+    self,
+    range_results: List[Dict[str, Any]],
+    job_id: int,
+    extraction_result_id: int,
+    page_count: int,
+    first_position_number: int,
+):
+    db = SessionLocal()
+
+    try:
+        # Locked, so a chord that was dispatched twice persists its result only once
+        job = db.query(Job).with_for_update().get(job_id)
+
+        if job.status != JobStatus.running:
+            return False
+
+        worker_metrics = StageMetrics()
+        pages = sum(len(range_result["positions"]) for range_result in range_results)
+
+        # Chord results arrive in the order of the header, which is page order
+        order_positions = []
+        position_number = first_position_number
+
+        with worker_metrics.stage("post_processing", pages=pages):
+            for range_result in range_results:
+                for positions in range_result["positions"]:
+                    for position in positions:
+                        pos = OrderPositionDto(**{**position, "position_number": position_number})
+                        order_positions.append(build_order_position_row(extraction_result_id, pos))
+                        position_number += 1
+
+        with worker_metrics.stage("db_write", pages=pages):
+            if order_positions:
+                db.execute(insert(OrderPosition), order_positions)
+
+        job.pages_processed = page_count
+        job.metrics = merge_metrics(
+            job.metrics,
+            *[range_result["metrics"] for range_result in range_results],
+            worker_metrics.to_dict(),
+        )
+        finish_job(db, job, JobStatus.completed)
+
+        return True
+
+    except Exception as e:
+        db.rollback()
+
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+        finish_job(db, db.query(Job).get(job_id), JobStatus.failed, str(e))
         raise
     finally:
         db.close()
+
+@celery_app.task
+def fail_document(request, exc, traceback, job_id: int):
+    # Error callback of the chord, runs once a page range failed for good
+    db = SessionLocal()
+
+    try:
+        job = db.query(Job).get(job_id)
+
+        if job.status == JobStatus.running:
+            finish_job(db, job, JobStatus.failed, str(exc))
+    finally:
+        db.close()
+
+    mark_job_failed(job_id)
+
+def process_document_signature(job_id: int, queue: str, priority: int, task_id: str):
+    return process_document.s(job_id).set(queue=queue, priority=priority, task_id=task_id)
+
+@celery_app.task
+def promote_due_jobs():
+    """
+    Moves pending jobs whose deadline is close to the front of the fast lane.
+    Runs periodically through celery beat.
+    """
+    db = SessionLocal()
+
+    try:
+        due = datetime.now(timezone.utc) + timedelta(seconds=settings.DEADLINE_PROMOTION_SECONDS)
+
+        # Jobs a worker is claiming right now are skipped, they start anyway
+        jobs = db.execute(
+            select(Job)
+            .where(
+                Job.status == JobStatus.pending,
+                Job.deadline_at <= due,
+                Job.duplicate_of_id.is_(None),
+                Job.priority != URGENT_PRIORITY,
+            )
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        for job in jobs:
+            route = promoted_route()
+
+            # Sent before the commit: if the commit fails, the old message stays valid,
+            # and a worker receiving the new one waits for the row lock
+            process_document_signature(job.id, **route).apply_async()
+
+            job.queue = route["queue"]
+            job.priority = route["priority"]
+            job.task_id = route["task_id"]
+
+        db.commit()
+
+        if jobs:
+            print(f"Promoted jobs close to their deadline: {[job.id for job in jobs]}")
+
+        return len(jobs)
+    finally:
+        db.close()
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # A redirect could point the callback at an internal address, 3xx is an error instead
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+webhook_opener = urllib.request.build_opener(_NoRedirectHandler)
+
+@celery_app.task(bind=True, max_retries=settings.WEBHOOK_MAX_RETRIES)
+def send_job_callback(self, job_id: int):
+    db = SessionLocal()
+
+    try:
+        job = db.get(Job, job_id)
+
+        if job is None or not job.callback_url:
+            return False
+
+        callback_url = job.callback_url
+        payload = {
+            "job_id": job.id,
+            "batch_id": job.batch_id,
+            "status": job.status.value,
+            "error": job.error,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        }
+    finally:
+        db.close()
+
+    # Exponential backoff: 5s, 10s, 20s, ...
+    countdown = settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** self.request.retries
+
+    # Checked again, the host may resolve to other addresses than at intake.
+    # Also fails on DNS errors, which are worth a retry.
+    if not is_valid_callback_url(callback_url):
+        raise self.retry(
+            exc=ValueError(f"Callback URL of job {job_id} does not resolve to public addresses: {callback_url}"),
+            countdown=countdown,
+        )
+
+    request = urllib.request.Request(
+        callback_url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+    try:
+        with webhook_opener.open(request, timeout=settings.WEBHOOK_TIMEOUT_SECONDS) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        # Redirects and other client errors will not go away on a retry
+        if 300 <= e.code < 500 and e.code not in (408, 429):
+            print(f"Callback for job {job_id} rejected with {e.code}: {callback_url}")
+            return False
+
+        raise self.retry(exc=e, countdown=countdown)
+    except (urllib.error.URLError, OSError) as e:
+        raise self.retry(exc=e, countdown=countdown)
+
+    return True
@@ -0,0 +1,59 @@
+import os
+from typing import Optional
+
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
+from prometheus_client import start_http_server
+
+from app.config.settings import settings
+from app.database.sync_session import engine
+from app.services.ocr.ocr_engine_factory import OcrEngineFactory
+from app.services.orc_service import OrderPositionExtractionService
+from app.services.prometheus_metrics import mark_process_dead, metrics_registry
+
+# Extraction service of the current worker process, shared by all its tasks
+_extraction_service: Optional[OrderPositionExtractionService] = None
+
+def get_extraction_service() -> OrderPositionExtractionService:
+    global _extraction_service
+
+    if _extraction_service is None:
+        _extraction_service = OrderPositionExtractionService()
+
+    return _extraction_service
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs) -> None:
+    # Runs in the main process only, it serves the samples of all children
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=metrics_registry())
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    # The pool was inherited from the parent process with its connections,
+    # the child drops them without closing them for the parent
+    engine.dispose(close=False)
+
+    # Tesseract handles and language data are loaded once per child instead of per task
+    try:
+        get_extraction_service().warm_up()
+    except Exception as e:
+        print(f"Warming up the OCR engine failed: {e}")
+
+    # Prefork children are daemonic and cannot start page workers, tell so at startup
+    # rather than with the first document
+    if get_extraction_service().max_workers > 1:
+        get_extraction_service().can_use_page_workers()
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    global _extraction_service
+
+    # Also runs when a child is replaced after passing worker_max_memory_per_child
+    if _extraction_service is not None:
+        _extraction_service.close()
+        _extraction_service = None
+
+    OcrEngineFactory.close_engine()
+    engine.dispose()
+
+    mark_process_dead(os.getpid())
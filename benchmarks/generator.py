@@ -0,0 +1,217 @@
+# RUN WITH:
+# docker compose exec ag-document-intelligence-service-api python -m benchmarks.generator --output /app/benchmarks/corpus
+#
+# Renders synthetic scanned order forms that follow LAYOUT/FIELDS of orc_config.py.
+# Every <name>.pdf gets a <name>.json with its ground truth, in the same format
+# as test/perfect-orc.json.
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config.field_config import KVK_DIGESTS_AFTER_DECIMAL, WGP_DIGESTS_AFTER_DECIMAL
+from app.config.orc_config import DPI, FIELDS, LAYOUT
+
+# A4
+PAGE_WIDTH = round(8.27 * DPI)
+PAGE_HEIGHT = round(11.69 * DPI)
+
+FONT_SIZE = 40
+
+DESCRIPTION_WORDS = [
+    "ACETO", "BALSAMICO", "DI", "MODENA", "CONDI", "BIANCO", "OLIO", "EXTRA",
+    "VERGINE", "PASTA", "SPAGHETTI", "PENNE", "TOMATEN", "PASSATA", "PESTO",
+    "GENOVESE", "PARMIGIANO", "REGGIANO", "MOZZARELLA", "RISOTTO", "REIS",
+    "KAFFEE", "BOHNEN", "ESPRESSO", "GRISSINI", "SALAMI", "MILANO", "KAPERN",
+]
+
+@dataclass
+class CorpusSpec:
+    documents: int = 10
+    pages: int = 3
+    # Rows per page are drawn from [min_rows, max_rows], capped by what fits on the page
+    min_rows: int = 4
+    max_rows: int = 11
+    # Standard deviation of the Gaussian pixel noise (0-255)
+    noise: float = 8.0
+    # Share of pixels flipped to black or white
+    speckle: float = 0.002
+    # Pages are rotated by a random angle in [-skew, skew] degrees
+    skew: float = 0.3
+    # Gaussian blur kernel size of the scanner optics (0 disables)
+    blur: int = 3
+    seed: int = 42
+
+def row_ys(page_index: int) -> range:
+    # Same candidate rows as OrderPositionExtractionService._candidate_row_ys
+    start_y = LAYOUT["start_y_first_page"] if page_index == 0 else LAYOUT["start_y_other_pages"]
+
+    return range(start_y, PAGE_HEIGHT - LAYOUT["row_height"], LAYOUT["row_height"])
+
+def random_position(rng: np.random.Generator) -> Dict[str, Any]:
+    description = " ".join(rng.choice(DESCRIPTION_WORDS, size=rng.integers(2, 4)))[:22].strip()
+    kvk = round(rng.uniform(0.5, 99.99), KVK_DIGESTS_AFTER_DECIMAL)
+    wgp = round(rng.uniform(0.1, 99.999), WGP_DIGESTS_AFTER_DECIMAL)
+
+    return {
+        "article_number": f"{rng.integers(0, 10**8):08d}",
+        "description": description,
+        "kvk": kvk,
+        "wgp": wgp,
+    }
+
+def field_texts(position: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "article_number": position["article_number"],
+        "description": position["description"],
+        "kvk": f"{position['kvk']:.{KVK_DIGESTS_AFTER_DECIMAL}f}",
+        "wgp": f"{position['wgp']:.{WGP_DIGESTS_AFTER_DECIMAL}f}",
+    }
+
+def draw_page(
+    page_index: int, positions: List[Dict[str, Any]], font: ImageFont.FreeTypeFont
+) -> np.ndarray:
+    page = Image.new("L", (PAGE_WIDTH, PAGE_HEIGHT), 255)
+    draw = ImageDraw.Draw(page)
+
+    if page_index == 0:
+        draw.text((LAYOUT["row_x_start"], 200), "BESTELLUNG", font=font, fill=0)
+
+    row_right = LAYOUT["row_x_start"] + LAYOUT["row_width"]
+
+    for y, position in zip(row_ys(page_index), positions):
+        # Table rule above the row, outside of every field ROI
+        draw.line((LAYOUT["row_x_start"], y, row_right, y), fill=0, width=2)
+
+        texts = field_texts(position)
+
+        for field in FIELDS:
+            x0 = LAYOUT["row_x_start"] + field["x_row_offset"]
+            y0 = y + field["y_row_offset"]
+
+            # Vertically centred in the ROI, the glyph box of the font starts 10 px below the origin
+            _, top, _, bottom = font.getbbox(texts[field["name"]])
+            text_y = y0 + (field["height"] - (bottom - top)) // 2 - top
+
+            draw.text((x0 + 4, text_y), texts[field["name"]], font=font, fill=0)
+
+    return np.asarray(page).copy()
+
+def degrade(page: np.ndarray, spec: CorpusSpec, rng: np.random.Generator) -> np.ndarray:
+    # Skew, optics, sensor noise and dust, in the order a scanner would add them
+    if spec.skew:
+        angle = rng.uniform(-spec.skew, spec.skew)
+        rotation = cv2.getRotationMatrix2D((PAGE_WIDTH / 2, PAGE_HEIGHT / 2), angle, 1.0)
+        page = cv2.warpAffine(
+            page,
+            rotation,
+            (PAGE_WIDTH, PAGE_HEIGHT),
+            flags=cv2.INTER_LINEAR,
+            borderValue=255,
+        )
+
+    if spec.blur:
+        page = cv2.GaussianBlur(page, (spec.blur, spec.blur), 0)
+
+    page = page.astype(np.float32)
+
+    if spec.noise:
+        page += rng.normal(0.0, spec.noise, page.shape).astype(np.float32)
+
+    if spec.speckle:
+        specks = rng.random(page.shape, dtype=np.float32)
+        page[specks < spec.speckle / 2] = 0
+        page[specks > 1 - spec.speckle / 2] = 255
+
+    return np.clip(page, 0, 255).astype(np.uint8)
+
+def generate_document(
+    spec: CorpusSpec, rng: np.random.Generator, font: ImageFont.FreeTypeFont
+) -> Tuple[List[np.ndarray], Dict[str, Any]]:
+    pages = []
+    positions = []
+
+    for page_index in range(spec.pages):
+        max_rows = min(spec.max_rows, len(row_ys(page_index)))
+        row_count = int(rng.integers(min(spec.min_rows, max_rows), max_rows + 1))
+        page_positions = [random_position(rng) for _ in range(row_count)]
+
+        pages.append(degrade(draw_page(page_index, page_positions, font), spec, rng))
+        positions.extend(page_positions)
+
+    ground_truth = {
+        "job_id": None,
+        "total_pages": spec.pages,
+        "positions": [
+            {name: {"value": value, "confidence": 100} for name, value in position.items()}
+            for position in positions
+        ],
+    }
+
+    return pages, ground_truth
+
+def generate_corpus(output_dir: Path, spec: CorpusSpec) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(spec.seed)
+    font = ImageFont.load_default(size=FONT_SIZE)
+
+    for document_index in range(spec.documents):
+        pages, ground_truth = generate_document(spec, rng, font)
+        name = f"synthetic_{document_index:04d}"
+
+        images = [Image.fromarray(page) for page in pages]
+        images[0].save(
+            output_dir / f"{name}.pdf",
+            "PDF",
+            resolution=DPI,
+            save_all=True,
+            append_images=images[1:],
+        )
+
+        with open(output_dir / f"{name}.json", "w") as f:
+            json.dump(ground_truth, f, indent=2)
+
+    with open(output_dir / "corpus.json", "w") as f:
+        json.dump(asdict(spec), f, indent=2)
+
+    print(f"Generated {spec.documents} documents with {spec.pages} pages each in {output_dir}")
+
+def main() -> None:
+    defaults = CorpusSpec()
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic order form corpus")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--documents", type=int, default=defaults.documents)
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--min-rows", type=int, default=defaults.min_rows)
+    parser.add_argument("--max-rows", type=int, default=defaults.max_rows)
+    parser.add_argument("--noise", type=float, default=defaults.noise)
+    parser.add_argument("--speckle", type=float, default=defaults.speckle)
+    parser.add_argument("--skew", type=float, default=defaults.skew)
+    parser.add_argument("--blur", type=int, default=defaults.blur)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        documents=args.documents,
+        pages=args.pages,
+        min_rows=args.min_rows,
+        max_rows=args.max_rows,
+        noise=args.noise,
+        speckle=args.speckle,
+        skew=args.skew,
+        blur=args.blur,
+        seed=args.seed,
+    )
+
+    generate_corpus(args.output, spec)
+
+if __name__ == "__main__":
+    main()
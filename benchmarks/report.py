@@ -0,0 +1,171 @@
+# RUN WITH:
+# docker compose exec ag-document-intelligence-service-api python -m benchmarks.report BASELINE.json CANDIDATE.json
+#
+# Builds the JSON report of a benchmark run, and compares two saved reports.
+
+import argparse
+import json
+import resource
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import orc_config
+from app.config.orc_config import FIELDS
+from app.utils.config_version import get_config_version
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def peak_rss_mib() -> Dict[str, float]:
+    # ru_maxrss is in KiB on Linux. "children" covers pdftoppm, tesseract and page workers.
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+def build_report(
+    corpus: Path,
+    label: Optional[str],
+    workers: int,
+    wall_seconds: float,
+    stage_metrics: Optional[Dict[str, Dict[str, float]]],
+    ocr_cache_stats: Dict[str, int],
+    documents: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    pages = sum(document["pages"] for document in documents)
+
+    # Accuracy only covers documents with ground truth
+    evaluated = [document for document in documents if document["expected_positions"] is not None]
+    expected_positions = sum(document["expected_positions"] for document in evaluated)
+
+    field_accuracy = {
+        field["name"]: (
+            sum(document["correct_fields"][field["name"]] for document in evaluated) / expected_positions
+            if expected_positions else None
+        )
+        for field in FIELDS
+    }
+
+    return {
+        "label": label,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config_version": get_config_version(),
+        "config": {
+            "dpi": orc_config.DPI,
+            "rendering": orc_config.RENDERING,
+            "preprocessing": orc_config.PREPROCESSING,
+            "page_processing": orc_config.PAGE_PROCESSING,
+            "ocr": orc_config.OCR,
+            "ocr_cache": orc_config.OCR_CACHE,
+        },
+        "corpus": str(corpus),
+        "workers": workers,
+        "documents": len(documents),
+        "pages": pages,
+        "wall_seconds": wall_seconds,
+        "pages_per_second": pages / wall_seconds if wall_seconds else None,
+        # Empty if JOB_METRICS_ENABLED is off. Rendering runs ahead in a background
+        # thread and page workers run in parallel, so stages can add up to more than the wall time.
+        "stage_metrics": stage_metrics or {},
+        "stage_ms_per_page": {
+            stage: values["wall_seconds"] / pages * 1000 if pages else None
+            for stage, values in (stage_metrics or {}).items()
+        },
+        "peak_rss_mib": peak_rss_mib(),
+        "ocr_cache": ocr_cache_stats,
+        "positions": {
+            "expected": expected_positions,
+            "extracted": sum(document["extracted_positions"] for document in evaluated),
+        },
+        "field_accuracy": field_accuracy,
+        "per_document": documents,
+    }
+
+def save_report(report: Dict[str, Any], output: Path) -> None:
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"documents:       {report['documents']} ({report['pages']} pages)")
+    print(f"wall time:       {report['wall_seconds']:.2f} s")
+    print(f"throughput:      {report['pages_per_second'] or 0:.2f} pages/s")
+    print(f"peak RSS:        {report['peak_rss_mib']['self']:.0f} MiB (children {report['peak_rss_mib']['children']:.0f} MiB)")
+
+    for stage, ms in report["stage_ms_per_page"].items():
+        print(f"{stage + ':':<16} {ms or 0:8.1f} ms/page")
+
+    print(f"positions:       {report['positions']['extracted']} of {report['positions']['expected']} expected")
+
+    for name, accuracy in report["field_accuracy"].items():
+        print(f"{name + ':':<16} {accuracy * 100 if accuracy is not None else float('nan'):6.1f} %")
+
+# (label, path into the report, higher is better)
+COMPARED_METRICS = [
+    ("pages/s", ("pages_per_second",), True),
+    ("wall s", ("wall_seconds",), False),
+    ("peak RSS MiB", ("peak_rss_mib", "self"), False),
+    *[
+        (f"{stage} ms/page", ("stage_ms_per_page", stage), False)
+        for stage in ("render", "preprocess", "detect_rows", "ocr")
+    ],
+    *[
+        (f"{field['name']} accuracy", ("field_accuracy", field["name"]), True)
+        for field in FIELDS
+    ],
+]
+
+def metric(report: Dict[str, Any], path) -> Optional[float]:
+    value = report
+
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+
+    return value
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> None:
+    print(f"{'':<24} {'baseline':>12} {'candidate':>12} {'change':>9}")
+
+    for label, path, higher_is_better in COMPARED_METRICS:
+        before = metric(baseline, path)
+        after = metric(candidate, path)
+
+        if before is None or after is None:
+            continue
+
+        change = (after - before) / before * 100 if before else 0.0
+        better = change > 0 if higher_is_better else change < 0
+        marker = "+" if better and abs(change) >= 1 else " "
+
+        print(f"{label:<24} {before:>12.3f} {after:>12.3f} {change:>8.1f}% {marker}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    compare_reports(baseline, candidate)
+
+if __name__ == "__main__":
+    main()
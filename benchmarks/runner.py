@@ -0,0 +1,124 @@
+# RUN WITH:
+# docker compose exec ag-document-intelligence-service-api python -m benchmarks.runner --corpus /app/benchmarks/corpus
+#
+# Runs OrderPositionExtractionService.extract_from_pdf over every <name>.pdf of a corpus
+# and scores the positions against <name>.json (test/perfect-orc.json format) if present.
+
+import argparse
+import json
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config.orc_config import FIELDS
+from app.dto import ExtractionResult
+from app.services.orc_service import OrderPositionExtractionService
+from app.services.stage_metrics import StageMetrics
+from app.worker import build_order_position_row
+from benchmarks.report import build_report, print_summary, save_report
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+def values_match(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float) and isinstance(actual, float):
+        return math.isclose(expected, actual, abs_tol=1e-9)
+
+    return expected == actual
+
+def score_document(ground_truth: Dict[str, Any], result: ExtractionResult) -> Dict[str, Any]:
+    # Extracted values go through the same post-processing and confidence
+    # threshold as the values the worker stores
+    rows = [build_order_position_row(0, position) for position in result.positions]
+    expected_positions = ground_truth["positions"]
+
+    correct_fields = {field["name"]: 0 for field in FIELDS}
+
+    # Positions are compared in order, missing or extra rows count as wrong
+    for expected, row in zip(expected_positions, rows):
+        for field in FIELDS:
+            name = field["name"]
+
+            if values_match(expected[name]["value"], row[f"{name}_value"]):
+                correct_fields[name] += 1
+
+    return {
+        "expected_positions": len(expected_positions),
+        "correct_fields": correct_fields,
+    }
+
+def run_benchmark(corpus: Path, workers: int, label: Optional[str]) -> Dict[str, Any]:
+    pdf_paths = sorted(corpus.glob("*.pdf"))
+
+    if not pdf_paths:
+        raise FileNotFoundError(f"No PDFs found in {corpus}")
+
+    service = OrderPositionExtractionService(max_workers=workers)
+    stage_metrics = StageMetrics()
+    ocr_cache_stats: Dict[str, int] = {}
+    documents = []
+
+    try:
+        run_start = time.perf_counter()
+
+        for pdf_path in pdf_paths:
+            start = time.perf_counter()
+            result = service.extract_from_pdf(str(pdf_path))
+            seconds = time.perf_counter() - start
+
+            stage_metrics.merge(service.stage_metrics.to_dict())
+
+            for key, value in service.ocr_cache_stats.items():
+                ocr_cache_stats[key] = ocr_cache_stats.get(key, 0) + value
+
+            document = {
+                "name": pdf_path.name,
+                "pages": result.total_pages,
+                "seconds": seconds,
+                "extracted_positions": len(result.positions),
+                "expected_positions": None,
+                "correct_fields": None,
+            }
+
+            ground_truth_path = pdf_path.with_suffix(".json")
+
+            if ground_truth_path.exists():
+                with open(ground_truth_path) as f:
+                    document.update(score_document(json.load(f), result))
+
+            documents.append(document)
+            print(f"{pdf_path.name}: {result.total_pages} pages in {seconds:.2f} s")
+
+        wall_seconds = time.perf_counter() - run_start
+    finally:
+        service.close()
+
+    return build_report(
+        corpus=corpus,
+        label=label,
+        workers=workers,
+        wall_seconds=wall_seconds,
+        stage_metrics=stage_metrics.to_dict(),
+        ocr_cache_stats=ocr_cache_stats,
+        documents=documents,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the extraction over a corpus")
+    parser.add_argument("--corpus", type=Path, required=True)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--label", default=None)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.corpus, args.workers, args.label)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    save_report(report, output)
+
+    print_summary(report)
+    print(f"Report saved to {output}")
+
+if __name__ == "__main__":
+    main()
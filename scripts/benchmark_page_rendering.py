@@ -0,0 +1,71 @@
+# RUN WITH:
+# docker compose exec ag-document-intelligence-service-api python /app/scripts/benchmark_page_rendering.py [PDF_PATH]
+#
+# Compares the old RGB rendering path (PNG -> PIL RGB -> np.array -> RGB2BGR -> BGR2GRAY)
+# with the direct grayscale path (pdftoppm -gray -> PGM -> numpy view) per page.
+
+import sys
+import time
+
+import cv2
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from app.config.orc_config import DPI
+from app.utils.render_pdf_pages_gray import render_pdf_pages_gray
+
+PDF_PATH = sys.argv[1] if len(sys.argv) > 1 else "/app/scripts/20260129_154217.pdf"
+
+# =====================
+# RENDERING PATHS
+# =====================
+
+def render_rgb(page_number):
+    page = convert_from_path(PDF_PATH, dpi=DPI, fmt="png", first_page=page_number, last_page=page_number)[0]
+
+    # Every intermediate buffer the old path allocates per page
+    pil_bytes = page.width * page.height * len(page.getbands())
+    img = np.array(page)
+    bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+    return gray, pil_bytes + img.nbytes + bgr.nbytes + gray.nbytes
+
+def render_gray(page_number):
+    gray = render_pdf_pages_gray(PDF_PATH, page_number, page_number, DPI)[0]
+
+    # The PGM bytes from stdout are the only buffer, the array is a view into them
+    return gray, gray.nbytes
+
+# =====================
+# MAIN
+# =====================
+
+page_count = pdfinfo_from_path(PDF_PATH)["Pages"]
+
+results = {}
+
+for name, render in (("rgb", render_rgb), ("gray", render_gray)):
+    total_time = 0.0
+    total_bytes = 0
+
+    for page_number in range(1, page_count + 1):
+        start = time.perf_counter()
+        gray, allocated_bytes = render(page_number)
+        total_time += time.perf_counter() - start
+        total_bytes += allocated_bytes
+
+    results[name] = (total_time / page_count, total_bytes / page_count)
+
+    print(
+        f"{name:>5}: {results[name][0] * 1000:8.1f} ms/page, "
+        f"{results[name][1] / 1024 / 1024:8.1f} MiB allocated/page"
+    )
+
+rgb_time, rgb_bytes = results["rgb"]
+gray_time, gray_bytes = results["gray"]
+
+print(
+    f"saved: {(rgb_time - gray_time) * 1000:8.1f} ms/page, "
+    f"{(rgb_bytes - gray_bytes) / 1024 / 1024:8.1f} MiB/page"
+)